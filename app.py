@@ -6,10 +6,13 @@ import os
 import chainlit as cl
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
-from config import APP_CONFIG, CHAT_CONFIG
+from config import APP_CONFIG, CHAT_CONFIG, CACHE_CONFIG
 from utils.test_handler import handle_message as handle_test_message
 from utils.ui import show_welcome_message, show_mode_switch_button
 from utils.response_handler import stream_response
+from utils.stop_criteria import build_stop_criteria
+from utils.length_model import get_length_model
+from utils.semantic_cache import get_semantic_cache
 
 # Load environment variables and initialize client
 load_dotenv()
@@ -39,11 +42,27 @@ async def main(message: cl.Message):
     if mode == "test":
         await handle_test_message(message, client)
     else:
+        # Serve near-duplicate questions from the semantic cache
+        if CACHE_CONFIG["enabled"]:
+            cached = get_semantic_cache().lookup(CHAT_CONFIG["system_template"], message.content)
+            if cached is not None:
+                await cl.Message(content=cached).send()
+                return
+        
         messages = [
             {"role": "system", "content": CHAT_CONFIG["system_template"]},
             {"role": "user", "content": message.content}
         ]
-        response = await stream_response(client, messages, CHAT_CONFIG["settings"])
+        length_model = get_length_model()
+        settings = length_model.apply("chat", APP_CONFIG["model"], CHAT_CONFIG["settings"])
+        info = {}
+        response = await stream_response(client, messages, settings, build_stop_criteria(), info)
+        length_model.record("chat", APP_CONFIG["model"], response, info["finish_reason"])
+        # Only cache complete answers, not ones cut short by a stop criterion or max_tokens
+        if CACHE_CONFIG["enabled"] and info["stop_reason"] is None and info["finish_reason"] == "stop":
+            get_semantic_cache().store(CHAT_CONFIG["system_template"], message.content, response)
+        if info["stop_reason"]:
+            response += f"\n\n> ⏹️ Stopped early: {info['stop_reason']}"
         await cl.Message(content=response).send()
 
 # This is the entry point for both local development and Hugging Face Spaces
@@ -70,6 +70,7 @@ TEST_CONFIG = {
     # Test types and their configurations
     "test1": {
         "template": "oop_explanation",
+        "tags": ["programming", "explanation"],
         "label": "🧩 OOP Concepts",
         "description": "Explain programming concepts clearly",
         "aspects": ["clarity", "simplicity", "understandability", "use of examples", "humor"],
@@ -77,10 +78,12 @@ TEST_CONFIG = {
         "templates": {
             "system": "You are a programming mentor who explains concepts with clarity and enthusiasm.",
             "user": "{input}"
-        }
+        },
+        "metrics": ["readability", "avg_sentence_length", "sentence_length_stdev"]
     },
     "test2": {
         "template": "paragraph_summary",
+        "tags": ["writing", "summarization"],
         "label": "📝 Quick Summary",
         "description": "Condense text while keeping key points",
         "aspects": ["conciseness", "accuracy", "key point retention", "clarity"],
@@ -88,10 +91,13 @@ TEST_CONFIG = {
         "templates": {
             "system": "You are a skilled summarizer who captures key points concisely.",
             "user": "Please summarize this text: {input}"
-        }
+        },
+        "metrics": ["compression_ratio", "key_term_overlap"],
+        "stop": {"max_words": 120}
     },
     "test3": {
         "template": "imaginative_story",
+        "tags": ["creative", "writing"],
         "label": "✨ Creative Tales",
         "description": "Generate engaging stories",
         "aspects": ["creativity", "structure", "engagement", "humor", "uniqueness"],
@@ -99,10 +105,12 @@ TEST_CONFIG = {
         "templates": {
             "system": "You are a creative storyteller who crafts hilarious, quirky, engaging and imaginative tales.",
             "user": "Create a story about: {input}"
-        }
+        },
+        "metrics": ["lexical_diversity"]
     },
     "test4": {
         "template": "math_problem",
+        "tags": ["math", "reasoning"],
         "label": "🔢 Math Solver",
         "description": "Break down math problems step by step",
         "aspects": ["step-by-step explanation", "mathematical accuracy", "clarity", "simplicity"],
@@ -110,10 +118,13 @@ TEST_CONFIG = {
         "templates": {
             "system": "You are a math tutor who explains solutions step by step with clarity.",
             "user": "Solve this problem: {input}"
-        }
+        },
+        "metrics": ["numeric_answer", "numbers_found"],
+        "expected_numbers": [3, 3]
     },
     "test5": {
         "template": "tone_rewrite",
+        "tags": ["writing", "business"],
         "label": "🎭 Style Shift",
         "description": "Rewrite text in different tones",
         "aspects": ["tone accuracy", "meaning preservation", "professionalism", "clarity"],
@@ -121,7 +132,9 @@ TEST_CONFIG = {
         "templates": {
             "system": "You are a writing expert who can adapt text to different tones while preserving meaning.",
             "user": "Rewrite this professionally: {input}"
-        }
+        },
+        "metrics": ["key_term_overlap", "readability"],
+        "stop": {"max_sentences": 8}
     },
     
     # Settings for different test modes
@@ -142,4 +155,61 @@ TEST_CONFIG = {
     "enabled": APP_CONFIG["mode"] == "test",
     "auto_test": APP_CONFIG["auto_test"],
     "log_level": "DEBUG" if APP_CONFIG["mode"] == "test" else "INFO"
-} 
\ No newline at end of file
+}
+
+# Automatic quality metrics configuration
+METRICS_CONFIG = {
+    "enabled": os.getenv("APP_METRICS", "true").lower() == "true",
+    "max_workers": int(os.getenv("APP_METRICS_WORKERS", "1")),  # 0 runs in a thread instead
+    "key_terms": 10,  # Number of input terms checked for key-term overlap
+}
+
+# LLM-as-judge configuration
+JUDGE_CONFIG = {
+    "enabled": os.getenv("APP_JUDGE", "false").lower() == "true",
+    "model": os.getenv("APP_JUDGE_MODEL", "gpt-3.5-turbo"),
+    "max_prompt_tokens": 6000,  # Budget for packing several comparisons into one request
+    "max_batch": 8,  # Maximum comparisons per judge request
+    "tokens_per_aspect": 25,  # Completion tokens reserved per aspect and response
+    "cache_size": 512,
+    "scale": 10,
+}
+
+# Semantic cache configuration for chat mode
+CACHE_CONFIG = {
+    "enabled": os.getenv("APP_SEMANTIC_CACHE", "false").lower() == "true",
+    "threshold": float(os.getenv("APP_SEMANTIC_CACHE_THRESHOLD", "0.9")),  # Minimum cosine similarity for a hit
+    "capacity": int(os.getenv("APP_SEMANTIC_CACHE_SIZE", "1024")),
+    "dimensions": 1024,  # Size of the hashed n-gram embedding
+    "ann": os.getenv("APP_SEMANTIC_CACHE_ANN", "false").lower() == "true",
+    "ann_min_size": int(os.getenv("APP_SEMANTIC_CACHE_ANN_MIN_SIZE", "256")),  # Entries before the approximate index replaces brute force; capped at the capacity
+    "ann_tables": 8,
+    "ann_bits": 10,
+}
+
+# Streaming stop criteria configuration
+STOP_CONFIG = {
+    "enabled": os.getenv("APP_STOP_CRITERIA", "true").lower() == "true",
+    "max_seconds": float(os.getenv("APP_STOP_MAX_SECONDS", "60")),  # Wall-clock cap per response
+    "repetition_ngram": 8,  # Words per repeated sequence; 0 disables repetition detection
+    "repetition_max": 3,  # Times a sequence may appear before streaming stops
+}
+
+# Adaptive max_tokens configuration
+LENGTH_CONFIG = {
+    "enabled": os.getenv("APP_ADAPTIVE_MAX_TOKENS", "true").lower() == "true",
+    "quantile": 0.95,  # Quantile of observed completion lengths to reserve
+    "headroom": 1.2,  # Initial multiplier on top of the quantile
+    "headroom_range": (1.05, 2.0),
+    "target_truncation": 0.02,  # Acceptable share of responses cut off by max_tokens
+    "min_samples": 20,  # Observations before the configured max_tokens is replaced
+    "min_tokens": 64,
+    "decay": 0.99,  # Weight kept by older observations on each new one
+}
+
+# Test catalog configuration
+CATALOG_CONFIG = {
+    "path": os.getenv("APP_CATALOG_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog")),
+    "page_size": 5,  # Tests shown per menu page
+    "reload_interval": 2.0,  # Seconds between checks for changed catalog files
+}
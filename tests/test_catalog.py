@@ -0,0 +1,154 @@
+import json
+import os
+
+# Renamed so pytest does not try to collect it as a test class
+from utils.catalog import TestCatalog as Catalog
+
+ENTRY = """
+{key}:
+  template: {key}
+  label: "{label}"
+  description: A test
+  tags: [{tag}]
+  aspects: [clarity, {aspect}]
+  example: Example input
+  templates:
+    system: System prompt
+    user: "Do this: {{input}}"
+"""
+
+def write(path, text):
+    """Write a catalog file and move its mtime forward so the change is always detected."""
+    mtime = os.stat(path).st_mtime + 10 if os.path.exists(path) else None
+    with open(path, "w", encoding="utf-8") as catalog_file:
+        catalog_file.write(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+def entry(key, label="Label", tag="writing", aspect="tone"):
+    return ENTRY.format(key=key, label=label, tag=tag, aspect=aspect)
+
+def test_loads_yaml_and_json_and_indexes(tmp_path):
+    write(tmp_path / "a.yaml", entry("review", tag="file-only", aspect="file aspect"))
+    write(tmp_path / "b.json", json.dumps({"email": {
+        "template": "email", "label": "Email", "description": "d", "tags": ["json-only"],
+        "aspects": ["clarity"], "example": "e", "templates": {"system": "s", "user": "{input}"},
+    }}))
+    write(tmp_path / "notes.txt", "ignored")
+    catalog = Catalog(str(tmp_path), reload_interval=0)
+
+    assert {"review", "email"} <= set(catalog.keys())
+    assert catalog.keys(tag="file-only") == ["review"]
+    assert catalog.keys(aspect="file aspect") == ["review"]
+    assert catalog.keys(tag="json-only", aspect="clarity") == ["email"]
+    assert catalog.keys(tag="json-only", aspect="file aspect") == []
+    assert {"file-only", "json-only"} <= set(catalog.tags())
+
+def test_file_entries_override_builtin_tests(tmp_path):
+    write(tmp_path / "a.yaml", entry("test1", label="Overridden"))
+    catalog = Catalog(str(tmp_path), reload_interval=0)
+    assert catalog.get("test1")["label"] == "Overridden"
+
+def test_invalid_entries_are_skipped(tmp_path):
+    write(tmp_path / "a.yaml", entry("good") + """
+scalar: 3
+string_tags:
+  template: t
+  label: L
+  description: D
+  tags: writing
+  aspects: [clarity]
+  example: e
+  templates: {system: s, user: "{input}"}
+string_aspects:
+  template: t
+  label: L
+  description: D
+  aspects: clarity
+  example: e
+  templates: {system: s, user: "{input}"}
+missing_user:
+  template: t
+  label: L
+  description: D
+  aspects: [clarity]
+  example: e
+  templates: {system: s}
+bad_stop:
+  template: t
+  label: L
+  description: D
+  aspects: [clarity]
+  example: e
+  templates: {system: s, user: "{input}"}
+  stop: 5
+""" + "".join(
+        entry(key).replace("  templates:", extra + "\n  templates:")
+        for key, extra in [
+            ("zero_words", "  stop: {max_words: 0}"),
+            ("float_sentences", "  stop: {max_sentences: 2.5}"),
+            ("string_seconds", "  stop: {max_seconds: soon}"),
+            ("sentinel_string", "  stop: {sentinels: END}"),
+            ("bad_sentinel", "  stop: {sentinels: ['[unclosed']}"),
+            ("string_numbers", "  expected_numbers: [4, four]"),
+            ("scalar_numbers", "  expected_numbers: 4"),
+        ]
+    ) + entry("bad_placeholder").replace('"Do this: {input}"', '"Do {this}: {input}"') + """
+good_limits:
+  template: t
+  label: L
+  description: D
+  aspects: [clarity]
+  example: e
+  expected_numbers: [4, 2.5]
+  templates: {system: s, user: "{input}"}
+  stop: {max_words: 50, max_sentences: 3, max_seconds: 1.5, sentinels: ['\\[END\\]']}
+""")
+    catalog = Catalog(str(tmp_path), reload_interval=0)
+    keys = catalog.keys()
+    assert {"good", "good_limits"} <= set(keys)
+    assert not {
+        "scalar", "string_tags", "string_aspects", "missing_user", "bad_stop", "zero_words", "float_sentences",
+        "string_seconds", "sentinel_string", "bad_sentinel", "string_numbers", "scalar_numbers", "bad_placeholder",
+    } & set(keys)
+    assert all(len(tag) > 1 for tag in catalog.tags())
+
+def test_unparseable_file_keeps_last_good_version(tmp_path):
+    path = tmp_path / "a.yaml"
+    write(path, entry("review"))
+    catalog = Catalog(str(tmp_path), reload_interval=0)
+    assert "review" in catalog.keys()
+
+    write(path, "review: [unclosed")
+    assert "review" in catalog.keys()
+    write(path, "- just\n- a list\n")
+    assert "review" in catalog.keys()
+
+    write(path, entry("renamed"))
+    keys = catalog.keys()
+    assert "renamed" in keys and "review" not in keys
+
+def test_removed_file_drops_its_tests(tmp_path):
+    write(tmp_path / "a.yaml", entry("review"))
+    catalog = Catalog(str(tmp_path), reload_interval=0)
+    assert catalog.get("review") is not None
+    os.remove(tmp_path / "a.yaml")
+    assert catalog.get("review") is None
+
+def test_changes_are_picked_up_after_reload_interval(tmp_path):
+    catalog = Catalog(str(tmp_path), reload_interval=3600)
+    catalog.keys()
+    write(tmp_path / "a.yaml", entry("review"))
+    assert catalog.get("review") is None
+    catalog.last_scan -= 3600
+    assert catalog.get("review") is not None
+
+def test_page_clamps_and_counts(tmp_path):
+    catalog = Catalog(str(tmp_path / "missing"), reload_interval=0)
+    keys = catalog.keys()
+    first, pages = catalog.page(0, 2)
+    assert first == keys[:2]
+    assert pages == -(-len(keys) // 2)
+    assert catalog.page(99, 2)[0] == keys[(pages - 1) * 2:]
+    assert catalog.page(-1, 2)[0] == first
+    assert catalog.page(0, 2, tag="no such tag") == ([], 1)
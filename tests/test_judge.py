@@ -0,0 +1,92 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from utils import judge
+from utils.judge import JUDGE_CONFIG, judge_comparisons, pack_items, parse_results
+
+ITEMS = [
+    (["clarity"], "input one", "default one", "specialized one"),
+    (["clarity", "tone"], "input two", "default two", "specialized two"),
+    (["clarity"], "input one", "default one", "specialized one"),
+]
+
+class StubClient:
+    """Answers judge requests with fixed scores and records every call, failing groups on request."""
+
+    def __init__(self, fail_ids=()):
+        self.calls = []
+        self.fail_ids = set(fail_ids)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **body):
+        prompt = body["messages"][1]["content"]
+        ids = [int(item_id) for item_id in re.findall(r"### Comparison (\d+)", prompt)]
+        self.calls.append(ids)
+        if self.fail_ids & set(ids):
+            raise RuntimeError("judge unavailable")
+        results = [
+            {"id": item_id, "default": {"clarity": 5, "tone": 5}, "specialized": {"clarity": 8, "tone": 7}, "verdict": "ok"}
+            for item_id in ids
+        ]
+        message = SimpleNamespace(content=json.dumps({"results": results}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+@pytest.fixture(autouse=True)
+def isolated_judge(monkeypatch):
+    # One token per character keeps budgets easy to reason about
+    monkeypatch.setattr(judge, "_count_tokens", len)
+    monkeypatch.setattr(judge, "_cache", judge.OrderedDict())
+
+def test_pack_items_respects_max_batch(monkeypatch):
+    monkeypatch.setitem(JUDGE_CONFIG, "max_prompt_tokens", 10 ** 6)
+    monkeypatch.setitem(JUDGE_CONFIG, "max_batch", 2)
+    items = ITEMS * 3
+    assert pack_items(items, list(range(len(items)))) == [[0, 1], [2, 3], [4, 5], [6, 7], [8]]
+
+def test_pack_items_respects_token_budget_and_keeps_oversized_items_alone(monkeypatch):
+    item_cost = len(judge._format_item(0, ITEMS[0]))
+    system_cost = len(judge.JUDGE_SYSTEM_TEMPLATE)
+    monkeypatch.setitem(JUDGE_CONFIG, "max_batch", 8)
+    monkeypatch.setitem(JUDGE_CONFIG, "max_prompt_tokens", system_cost + 2 * item_cost + 1)
+    items = [ITEMS[0]] * 3 + [(["clarity"], "x" * 10 * item_cost, "d", "s"), ITEMS[0]]
+    assert pack_items(items, list(range(len(items)))) == [[0, 1], [2], [3], [4]]
+    assert pack_items(items, []) == []
+
+def test_parse_results_keeps_only_well_formed_requested_results():
+    content = json.dumps({"results": [
+        {"id": 0, "default": {"clarity": 4}, "specialized": {"clarity": "9"}, "verdict": "better"},
+        {"id": 1, "default": {"clarity": 4}, "specialized": {"clarity": 9}},  # missing "tone"
+        {"id": 2, "default": {"clarity": 4}, "specialized": {"clarity": 9}},  # not in the group
+        {"id": 0.0, "default": {"clarity": 1}, "specialized": {"clarity": 1}},  # float id
+        "not a result",
+    ]})
+    parsed = parse_results(content, ITEMS, [0, 1])
+    assert parsed == {0: {"default": {"clarity": 4.0}, "specialized": {"clarity": 9.0}, "verdict": "better"}}
+
+def test_parse_results_tolerates_non_json():
+    assert parse_results("not json", ITEMS, [0]) == {}
+    assert parse_results("[1, 2]", ITEMS, [0]) == {}
+    assert parse_results(json.dumps({"results": [{"id": 0, "default": None}]}), ITEMS, [0]) == {}
+
+def test_identical_comparisons_are_judged_once_and_cached():
+    client = StubClient()
+    results = asyncio.run(judge_comparisons(client, ITEMS))
+    assert client.calls == [[0, 1]]
+    assert results[0] == results[2]
+    assert results[1]["specialized"] == {"clarity": 8.0, "tone": 7.0}
+
+    again = asyncio.run(judge_comparisons(client, ITEMS[:2]))
+    assert again == results[:2]
+    assert len(client.calls) == 1
+
+def test_failed_group_leaves_only_its_items_unjudged(monkeypatch):
+    monkeypatch.setitem(JUDGE_CONFIG, "max_batch", 1)
+    client = StubClient(fail_ids={0})
+    results = asyncio.run(judge_comparisons(client, ITEMS))
+    assert client.calls == [[0], [1]]
+    assert results[0] is None and results[2] is None
+    assert results[1] is not None
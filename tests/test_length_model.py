@@ -0,0 +1,85 @@
+import numpy as np
+
+from utils import length_model
+from utils.length_model import LENGTH_CONFIG, LengthStats, OutputLengthModel, QuantileSketch, count_tokens
+
+def test_quantile_within_bucket_resolution():
+    sketch = QuantileSketch(decay=1.0)
+    for value in range(1, 1001):
+        sketch.add(value)
+    assert sketch.samples == 1000
+    assert 950 <= sketch.quantile(0.95) <= 950 * 1.06
+    assert 500 <= sketch.quantile(0.5) <= 500 * 1.06
+
+def test_quantile_favours_recent_observations():
+    sketch = QuantileSketch(decay=0.9)
+    for _ in range(100):
+        sketch.add(1000)
+    for _ in range(100):
+        sketch.add(100)
+    assert sketch.quantile(0.95) < 110
+
+def test_values_outside_bucket_range_are_clamped():
+    sketch = QuantileSketch(decay=1.0)
+    sketch.add(0)
+    assert sketch.quantile(0.5) == 1
+    sketch = QuantileSketch(decay=1.0)
+    sketch.add(10 ** 9)
+    assert sketch.quantile(0.5) == 16384
+
+def warm_up(stats, tokens=200):
+    for _ in range(LENGTH_CONFIG["min_samples"]):
+        stats.record(tokens, False)
+
+def test_ceiling_and_headroom_untouched_during_warm_up():
+    stats = LengthStats()
+    for _ in range(LENGTH_CONFIG["min_samples"] - 1):
+        stats.record(200, False)
+        assert stats.max_tokens(1000) == 1000
+    stats.record(200, True)
+    assert stats.headroom == LENGTH_CONFIG["headroom"]
+    assert stats.truncation_rate == 0.0
+
+def test_max_tokens_sized_from_history():
+    stats = LengthStats()
+    warm_up(stats)
+    quantile = stats.sketch.quantile(LENGTH_CONFIG["quantile"])
+    assert stats.max_tokens(1000) == int(np.ceil(quantile * LENGTH_CONFIG["headroom"]))
+    # Never above the configured ceiling or below the floor
+    assert stats.max_tokens(100) == 100
+    short = LengthStats()
+    warm_up(short, tokens=2)
+    assert short.max_tokens(1000) == LENGTH_CONFIG["min_tokens"]
+
+def test_truncation_widens_and_clean_runs_narrow_headroom():
+    low, high = LENGTH_CONFIG["headroom_range"]
+    stats = LengthStats()
+    warm_up(stats)
+    stats.record(200, True)
+    assert stats.headroom > LENGTH_CONFIG["headroom"]
+    for _ in range(50):
+        stats.record(200, True)
+    assert stats.headroom == high
+
+    for _ in range(2000):
+        stats.record(200, False)
+    assert stats.headroom == low
+
+def test_model_apply_copies_settings_and_keys_by_test_and_model():
+    model = OutputLengthModel()
+    settings = {"temperature": 0.5, "max_tokens": 1000}
+    for _ in range(LENGTH_CONFIG["min_samples"]):
+        model.record("summary", "gpt-x", "word " * 50, "stop")
+
+    applied = model.apply("summary", "gpt-x", settings)
+    assert applied["max_tokens"] < 1000
+    assert settings["max_tokens"] == 1000
+    assert model.apply("summary", "gpt-y", settings)["max_tokens"] == 1000
+    assert model.apply("story", "gpt-x", settings)["max_tokens"] == 1000
+    assert model.apply("summary", "gpt-x", {"temperature": 0.5}) == {"temperature": 0.5}
+    assert model.report("summary", "gpt-x")["samples"] == LENGTH_CONFIG["min_samples"]
+
+def test_count_tokens_estimates_without_encoding(monkeypatch):
+    monkeypatch.setattr(length_model, "_encoding", lambda model: None)
+    assert count_tokens("", "gpt-x") == 0
+    assert count_tokens("abcdefghi", "gpt-x") == 3
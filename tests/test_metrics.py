@@ -0,0 +1,50 @@
+import math
+
+import pytest
+
+from utils.metrics import METRIC_LABELS, build_comparison, score_batch
+
+ALL_METRICS = list(METRIC_LABELS)
+INPUT = "Tell me about the cat and the dog."
+DEFAULT = "The cat sat. The dog ran far."
+
+def test_text_metrics_on_hand_checked_response():
+    scores = score_batch([(ALL_METRICS, INPUT, DEFAULT, "A cat.", None)])[0]["default"]
+    # 7 one-syllable words in sentences of 3 and 4 words
+    assert scores["avg_sentence_length"] == pytest.approx(3.5)
+    assert scores["sentence_length_stdev"] == pytest.approx(0.5)
+    assert scores["readability"] == pytest.approx(206.835 - 1.015 * 3.5 - 84.6)
+    assert scores["lexical_diversity"] == pytest.approx(6 / 7)
+    assert scores["compression_ratio"] == pytest.approx(7 / 8)
+    # Key terms of the input are tell, about, cat and dog
+    assert scores["key_term_overlap"] == pytest.approx(0.5)
+    assert scores["numbers_found"] == 0
+    assert math.isnan(scores["numeric_answer"])
+
+def test_key_term_count_limits_terms_checked():
+    scores = score_batch([(["key_term_overlap"], INPUT, DEFAULT, "Tell me.", None)], key_terms=1)[0]
+    assert scores == {"default": {"key_term_overlap": 1.0}, "specialized": {"key_term_overlap": 0.0}}
+
+def test_empty_response_has_nan_readability():
+    scores = score_batch([(["readability", "lexical_diversity"], INPUT, DEFAULT, "", None)])[0]
+    assert math.isnan(scores["specialized"]["readability"])
+    assert scores["specialized"]["lexical_diversity"] == 0.0
+    assert not math.isnan(scores["default"]["readability"])
+
+def test_numeric_answer_checks_expected_numbers():
+    comparison = (["numeric_answer", "numbers_found"], "q", "Buy 4 packs.", "I need 3 packs, then 3 more.", [3, 3])
+    scores = score_batch([comparison])[0]
+    assert scores["default"] == {"numeric_answer": 0.0, "numbers_found": 1.0}
+    assert scores["specialized"] == {"numeric_answer": 1.0, "numbers_found": 2.0}
+
+def test_scores_only_requested_metrics_per_comparison():
+    scores = score_batch([(["readability"], INPUT, DEFAULT, DEFAULT, None), (["no_such_metric"], INPUT, "a", "b", None)])
+    assert list(scores[0]["default"]) == ["readability"]
+    assert scores[1] == {"default": {}, "specialized": {}}
+    assert score_batch([]) == []
+
+def test_build_comparison_only_expects_numbers_for_the_example_input():
+    test_config = {"metrics": ["numeric_answer"], "example": "What is 1 + 2?", "expected_numbers": [3]}
+    assert build_comparison(test_config, "What is 1 + 2?", "d", "s") == (["numeric_answer"], "What is 1 + 2?", "d", "s", [3])
+    assert build_comparison(test_config, "What is 2 + 2?", "d", "s")[4] is None
+    assert build_comparison({"example": "e"}, "e", "d", "s") == ([], "e", "d", "s", None)
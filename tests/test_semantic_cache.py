@@ -0,0 +1,105 @@
+import numpy as np
+
+from utils import semantic_cache
+from utils.semantic_cache import CACHE_CONFIG, LSHIndex, SemanticCache, embed, key_terms, same_meaning
+
+def test_embed_is_normalized_and_deterministic():
+    vector = embed("What is inheritance in OOP?", 256)
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+    assert np.array_equal(vector, embed("What is inheritance in OOP?", 256))
+    assert not embed("?!", 256).any()
+    # Only content words are embedded, so filler and plurals do not move the vector
+    assert np.array_equal(embed("explain inheritance in OOP", 256), embed("What is inheritance in OOP?", 256))
+    assert np.array_equal(embed("How do hash maps work?", 256), embed("how does a hash map work", 256))
+
+def test_key_terms_keep_numbers_and_negations():
+    assert key_terms("What's the capital of France?") == ("capital", "france")
+    assert key_terms("Why isn't 2 + 2 equal to 5?") == ("isn't", "2", "2", "equal", "5")
+    assert key_terms("How do classes and properties work?") == ("class", "property", "work")
+
+def test_same_meaning_checks_numbers_negations_and_order():
+    assert same_meaning(("python", "faster", "java"), ("python", "quicker", "java"))
+    assert not same_meaning(("python", "faster", "java"), ("java", "faster", "python"))
+    assert not same_meaning(("2", "2"), ("2", "3"))
+    assert not same_meaning(("enable", "2fa"), ("not", "enable", "2fa"))
+    assert not same_meaning(("can't", "enable"), ("won't", "enable"))
+
+def test_hit_for_rewording_miss_for_other_template():
+    cache = SemanticCache(capacity=8, dimensions=1024, threshold=0.9)
+    cache.store("system", "What is inheritance in OOP?", "answer")
+    assert cache.lookup("system", "what is inheritance in oop") == "answer"
+    assert cache.lookup("other system", "what is inheritance in oop") is None
+
+def test_same_content_word_rewording_hits_at_default_threshold():
+    cache = SemanticCache(capacity=8, dimensions=1024, threshold=CACHE_CONFIG["threshold"])
+    cache.store("system", "explain inheritance in OOP", "answer")
+    assert cache.lookup("system", "What is inheritance in OOP?") == "answer"
+    assert cache.lookup("system", "Can you describe inheritance in oop, please") == "answer"
+
+def test_similar_questions_with_different_answers_miss():
+    cache = SemanticCache(capacity=8, dimensions=1024, threshold=CACHE_CONFIG["threshold"])
+    cache.store("system", "How do I enable two factor authentication on my GitHub account?", "enable")
+    cache.store("system", "What is the capital of Austria?", "vienna")
+    assert cache.lookup("system", "How do I disable two factor authentication on my GitHub account?") is None
+    assert cache.lookup("system", "What is the capital of Australia?") is None
+
+def test_numbers_negations_and_swapped_operands_miss_at_any_threshold():
+    cache = SemanticCache(capacity=8, dimensions=1024, threshold=0.0)
+    cache.store("system", "How do I enable 2FA?", "enable")
+    cache.store("system", "Is Python faster than Java?", "python")
+    cache.store("system", "What is 2 + 2?", "four")
+    assert cache.lookup("system", "Is Java faster than Python?") is None
+    assert cache.lookup("system", "What is 2 + 3?") is None
+    assert cache.lookup("system", "How do I not enable 2FA?") is None
+    assert cache.lookup("system", "how do i enable 2fa") == "enable"
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticCache(capacity=2, dimensions=1024, threshold=0.9)
+    cache.store("system", "first question", "1")
+    cache.store("system", "second question", "2")
+    assert cache.lookup("system", "first question") == "1"
+    cache.store("system", "third question", "3")
+    assert cache.size == 2
+    assert cache.lookup("system", "second question") is None
+    assert cache.lookup("system", "first question") == "1"
+    assert cache.lookup("system", "third question") == "3"
+
+def test_lsh_index_add_and_remove():
+    index = LSHIndex(dimensions=64, tables=4, bits=6)
+    first, second = embed("alpha beta gamma", 64), embed("delta epsilon", 64)
+    index.add(0, first)
+    index.add(1, second)
+    assert 0 in index.candidates(first)
+    assert 1 in index.candidates(second)
+
+    # Re-adding a row moves it instead of leaving stale buckets behind
+    index.add(0, second)
+    assert 0 in index.candidates(second)
+    assert sum(len(rows) for table in index.buckets for rows in table.values()) == 2 * 4
+
+    index.remove(0)
+    index.remove(1)
+    index.remove(1)
+    assert index.row_keys == {}
+    assert all(not table for table in index.buckets)
+    assert index.candidates(first).size == 0
+
+def test_ann_lookup_and_eviction_keep_index_in_sync(monkeypatch):
+    monkeypatch.setitem(semantic_cache.CACHE_CONFIG, "ann_min_size", 1)
+    cache = SemanticCache(capacity=2, dimensions=1024, threshold=0.9, ann=True)
+    cache.store("system", "first question", "1")
+    cache.store("system", "second question", "2")
+    assert cache.lookup("system", "first question") == "1"
+    cache.store("system", "third question", "3")
+    assert cache.lookup("system", "second question") is None
+    assert cache.lookup("system", "third question") == "3"
+    assert sorted(cache.index.row_keys) == [0, 1]
+
+def test_ann_min_size_is_capped_at_capacity(monkeypatch):
+    monkeypatch.setitem(semantic_cache.CACHE_CONFIG, "ann_min_size", 10 ** 6)
+    cache = SemanticCache(capacity=1, dimensions=1024, threshold=0.9, ann=True)
+    cache.store("system", "only question", "1")
+    calls = []
+    monkeypatch.setattr(cache.index, "candidates", lambda vector: calls.append(vector) or np.array([0]))
+    assert cache.lookup("system", "only question") == "1"
+    assert calls
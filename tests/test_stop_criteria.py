@@ -0,0 +1,92 @@
+from utils import stop_criteria
+from utils.stop_criteria import (
+    RegexSentinel,
+    RepetitionDetector,
+    SentenceBudget,
+    WallClock,
+    WordBudget,
+    budget_instruction,
+    build_stop_criteria,
+)
+
+def feed(criterion, chunks, elapsed=0.0):
+    """Stream chunks through a criterion the way stream_response does."""
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        reason = criterion.check(text, chunk, elapsed)
+        if reason:
+            return reason, criterion.trim(text)
+    return None, text
+
+def test_word_budget_counts_words_split_across_chunks():
+    criterion = WordBudget(5)
+    reason, text = feed(criterion, ["Hel", "lo wor", "ld, th", "is is", " fine"])
+    assert reason is None
+    assert criterion.words == 5
+
+    reason, text = feed(WordBudget(5), ["Hel", "lo wor", "ld, th", "is is", " fine", " and more"])
+    assert reason == "word budget of 5 reached"
+    assert text == "Hello world, this is fine"
+
+def test_word_budget_trims_back_to_last_sentence():
+    criterion = WordBudget(6)
+    reason, text = feed(criterion, ["One two. Three four five. Six ", "seven eight nine"])
+    assert reason is not None
+    assert text == "One two. Three four five."
+
+def test_word_budget_without_sentence_end_cuts_at_budget():
+    assert WordBudget(3).trim("one two three four five") == "one two three"
+
+def test_sentence_budget_stops_after_completed_sentences():
+    reason, text = feed(SentenceBudget(2), ["First one. Sec", "ond one! Third", " one? Fourth"])
+    assert reason == "sentence budget of 2 reached"
+    assert text == "First one. Second one!"
+
+def test_sentence_budget_ignores_unfinished_sentence():
+    reason, _ = feed(SentenceBudget(2), ["First one. Second one", " is still going"])
+    assert reason is None
+
+def test_repetition_detector_fires_on_repeated_sequence():
+    criterion = RepetitionDetector(ngram=3, max_repeats=3)
+    reason, _ = feed(criterion, ["I am here. " * 2, "I am here. ", "I am here. "])
+    assert reason == "repeated text detected (3-word sequence seen 3 times)"
+
+def test_repetition_detector_ignores_varied_text_and_partial_words():
+    criterion = RepetitionDetector(ngram=2, max_repeats=2)
+    reason, _ = feed(criterion, ["the cat sat on the mat and the ca"])
+    assert reason is None
+    # "the ca" is incomplete; once it finishes as "the cat" the bigram repeats
+    reason, _ = feed(criterion, ["the cat sat on the mat and the ca", "t "])
+    assert reason is not None
+
+def test_regex_sentinel_trims_before_match():
+    reason, text = feed(RegexSentinel(r"\[END\]"), ["Answer text ", "[EN", "D] trailing"])
+    assert reason == r"sentinel /\[END\]/ matched"
+    assert text == "Answer text"
+
+def test_wall_clock():
+    assert WallClock(5).check("text", "t", 4.9) is None
+    assert WallClock(5).check("text", "t", 5.0) == "time limit of 5s reached"
+
+def test_build_stop_criteria_merges_aspect_and_test_limits():
+    criteria = build_stop_criteria({"aspects": ["conciseness", "simplicity"], "stop": {"max_sentences": 3}})
+    by_type = {type(criterion): criterion for criterion in criteria}
+    assert by_type[WordBudget].max_words == 250
+    assert by_type[SentenceBudget].max_sentences == 3
+    assert WallClock in by_type and RepetitionDetector in by_type
+
+    criteria = build_stop_criteria({"aspects": ["conciseness"], "stop": {"max_words": 500}})
+    assert next(c for c in criteria if isinstance(c, WordBudget)).max_words == 500
+
+def test_build_stop_criteria_disabled(monkeypatch):
+    monkeypatch.setitem(stop_criteria.STOP_CONFIG, "enabled", False)
+    assert build_stop_criteria({"stop": {"max_words": 10}}) == []
+    assert budget_instruction({"aspects": [], "stop": {"max_words": 10}}) == ""
+
+def test_budget_instruction():
+    assert budget_instruction({"aspects": [], "stop": {"max_words": 120}}) == "Keep your answer to at most 120 words."
+    assert budget_instruction({"aspects": ["conciseness"], "stop": {"max_sentences": 8}}) == (
+        "Keep your answer to at most 250 words and 8 sentences."
+    )
+    assert budget_instruction({"aspects": ["creativity"]}) == ""
@@ -0,0 +1,292 @@
+"""
+Bulk Runner - Runs test comparisons offline through the provider's batch-file workflow.
+
+Default and specialized requests for every test input are compiled into a batch JSONL file,
+uploaded and submitted as a batch, polled until the batch finishes, and joined back to their
+inputs with local metrics. With --judge, the joined comparisons are then packed several to a request
+into a second batch file of LLM-judge requests, which goes through the same workflow. Batch requests
+are billed at batch pricing and do not compete with interactive users for rate limits.
+
+Run against the real API:
+    python -m tools.bulk --inputs regression.jsonl --output results.jsonl
+
+Or fully offline against the local stand-in server:
+    python -m tools.bulk --local
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+from openai import AsyncOpenAI
+
+from config import APP_CONFIG, METRICS_CONFIG, TEST_CONFIG
+from utils.judge import JudgeItem, judge_key, judge_request, pack_items, parse_results
+from utils.metrics import METRIC_LABELS, build_comparison, score_batch
+from utils.prompts import adjust_settings_for_aspects, build_messages
+from utils.catalog import get_catalog
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+def load_cases(tests: Optional[List[str]], tag: Optional[str], inputs_path: Optional[str]) -> List[Dict[str, str]]:
+    """Collect test inputs: each test's example plus any inputs from a JSONL file."""
+    catalog = get_catalog()
+    test_keys = [key for key in catalog.keys(tag=tag) if not tests or key in tests]
+    cases = [{"test": key, "input": catalog.get(key)["example"]} for key in test_keys]
+
+    if inputs_path:
+        with open(inputs_path, encoding="utf-8") as inputs:
+            for line in filter(str.strip, inputs):
+                case = json.loads(line)
+                if case["test"] in test_keys:
+                    cases.append({"test": case["test"], "input": case["input"]})
+    return cases
+
+def compile_requests(cases: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Compile default and specialized chat completion requests for every case."""
+    requests = []
+    for index, case in enumerate(cases):
+        test_config = get_catalog().get(case["test"])
+        default_messages, specialized_messages = build_messages(test_config, case["input"])
+        variants = {
+            "default": (default_messages, TEST_CONFIG["settings"]["default"]),
+            "specialized": (
+                specialized_messages,
+                adjust_settings_for_aspects(TEST_CONFIG["settings"]["specialized"], test_config["aspects"])
+            ),
+        }
+        for variant, (messages, settings) in variants.items():
+            requests.append({
+                "custom_id": f"{index}:{variant}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": APP_CONFIG["model"], "messages": messages, **settings},
+            })
+    return requests
+
+def write_batch_file(requests: List[Dict[str, Any]], path: str):
+    """Write requests as a batch JSONL file."""
+    with open(path, "w", encoding="utf-8") as batch_file:
+        for request in requests:
+            batch_file.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+async def submit_batch(client: AsyncOpenAI, path: str) -> Dict[str, Any]:
+    """Upload a batch file and start a batch for it."""
+    with open(path, "rb") as batch_file:
+        uploaded = await client.files.create(file=(os.path.basename(path), batch_file.read()), purpose="batch")
+    response = await client.post(
+        "/batches",
+        cast_to=httpx.Response,
+        body={"input_file_id": uploaded.id, "endpoint": "/v1/chat/completions", "completion_window": "24h"}
+    )
+    return response.json()
+
+async def wait_for_batch(client: AsyncOpenAI, batch_id: str, interval: float) -> Dict[str, Any]:
+    """Poll a batch until it reaches a terminal status."""
+    while True:
+        batch = (await client.get(f"/batches/{batch_id}", cast_to=httpx.Response)).json()
+        counts = batch.get("request_counts") or {}
+        print(f"Batch {batch_id}: {batch['status']} ({counts.get('completed', 0)}/{counts.get('total', 0)} completed)")
+        if batch["status"] in TERMINAL_STATUSES:
+            return batch
+        await asyncio.sleep(interval)
+
+async def fetch_outputs(client: AsyncOpenAI, batch: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Download batch output and error files, keyed by custom_id."""
+    outputs = {}
+    for file_id in (batch.get("output_file_id"), batch.get("error_file_id")):
+        if not file_id:
+            continue
+        content = await client.files.content(file_id)
+        for line in filter(str.strip, content.text.splitlines()):
+            row = json.loads(line)
+            outputs[row["custom_id"]] = row
+    return outputs
+
+def _response_text(row: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Extract the completion text from a batch output row, if it succeeded."""
+    if not row or row.get("error") or not row.get("response") or row["response"].get("status_code") != 200:
+        return None
+    return row["response"]["body"]["choices"][0]["message"]["content"]
+
+def _row_error(row: Optional[Dict[str, Any]]) -> Any:
+    """Describe why a batch output row has no completion, or None if it has one."""
+    if row is None:
+        return "missing"
+    if row.get("error"):
+        return row["error"]
+    response = row.get("response") or {}
+    if response.get("status_code") != 200:
+        body = response.get("body")
+        return {"status_code": response.get("status_code"), "error": body.get("error") if isinstance(body, dict) else body}
+    return None
+
+def join_results(cases: List[Dict[str, str]], outputs: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Join batch outputs back to their inputs and score them."""
+    results = []
+    for index, case in enumerate(cases):
+        rows = {variant: outputs.get(f"{index}:{variant}") for variant in ("default", "specialized")}
+        results.append({
+            **case,
+            "default": _response_text(rows["default"]),
+            "specialized": _response_text(rows["specialized"]),
+            "errors": {variant: _row_error(row) for variant, row in rows.items()},
+        })
+
+    # Score all successful comparisons in one vectorized batch
+    scored = [result for result in results if result["default"] is not None and result["specialized"] is not None]
+    comparisons = [
+        build_comparison(get_catalog().get(result["test"]), result["input"], result["default"], result["specialized"])
+        for result in scored
+    ]
+    for result, metrics in zip(scored, score_batch(comparisons, METRICS_CONFIG["key_terms"])):
+        result["metrics"] = metrics
+    return results
+
+def compile_judge_requests(items: List[JudgeItem]) -> Tuple[List[Dict[str, Any]], List[List[int]]]:
+    """Pack comparisons into judge requests; identical comparisons are only judged once."""
+    unique: Dict[str, int] = {}
+    for index, item in enumerate(items):
+        unique.setdefault(judge_key(item), index)
+    groups = pack_items(items, list(unique.values()))
+    requests = [
+        {"custom_id": f"judge:{number}", "method": "POST", "url": "/v1/chat/completions", "body": judge_request(items, group)}
+        for number, group in enumerate(groups)
+    ]
+    return requests, groups
+
+async def judge_results(client: AsyncOpenAI, results: List[Dict[str, Any]], path: str, interval: float) -> int:
+    """Judge successful comparisons against their test aspects in a second batch."""
+    judged = [result for result in results if "metrics" in result]
+    items = [
+        (get_catalog().get(result["test"])["aspects"], result["input"], result["default"], result["specialized"])
+        for result in judged
+    ]
+    if not items:
+        return 0
+    requests, groups = compile_judge_requests(items)
+    write_batch_file(requests, path)
+    print(f"Compiled {len(requests)} judge requests for {len(items)} comparisons into {path}")
+
+    batch = await submit_batch(client, path)
+    batch = await wait_for_batch(client, batch["id"], interval)
+    outputs = await fetch_outputs(client, batch)
+    judgements: Dict[str, Dict[str, Any]] = {}
+    for request, group in zip(requests, groups):
+        content = _response_text(outputs.get(request["custom_id"]))
+        for index, judgement in (parse_results(content, items, group) if content else {}).items():
+            judgements[judge_key(items[index])] = judgement
+
+    for result, item in zip(judged, items):
+        result["judgement"] = judgements.get(judge_key(item))
+    return sum(1 for result in judged if result["judgement"] is not None)
+
+def _without_nan(value: Any) -> Any:
+    """Replace NaN metrics (metric does not apply) with None so the output is valid JSON."""
+    if isinstance(value, dict):
+        return {key: _without_nan(item) for key, item in value.items()}
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+def report(results: List[Dict[str, Any]]):
+    """Print mean metrics per test."""
+    print("\n| Test | Cases | Failed | Metric | Default | Specialized |")
+    print("|:-----|:------|:-------|:-------|:--------|:------------|")
+    for test_key in dict.fromkeys(result["test"] for result in results):
+        rows = [result for result in results if result["test"] == test_key]
+        failed = sum(1 for row in rows if "metrics" not in row)
+        scored = [row["metrics"] for row in rows if "metrics" in row]
+        names = list(scored[0]["default"]) if scored else []
+        judgements = [row["judgement"] for row in rows if row.get("judgement")]
+        if not names and not judgements:
+            print(f"| {test_key} | {len(rows)} | {failed} | - | - | - |")
+        for name in names:
+            default_mean = np.nanmean([metrics["default"][name] for metrics in scored])
+            specialized_mean = np.nanmean([metrics["specialized"][name] for metrics in scored])
+            print(f"| {test_key} | {len(rows)} | {failed} | {METRIC_LABELS.get(name, name)} | {default_mean:.2f} | {specialized_mean:.2f} |")
+        if judgements:
+            default_mean = np.mean([np.mean(list(judgement["default"].values())) for judgement in judgements])
+            specialized_mean = np.mean([np.mean(list(judgement["specialized"].values())) for judgement in judgements])
+            print(f"| {test_key} | {len(rows)} | {failed} | Judge (mean aspect score) | {default_mean:.2f} | {specialized_mean:.2f} |")
+
+def start_local_server(port: int) -> subprocess.Popen:
+    """Start the local stand-in server and wait until it answers."""
+    server = subprocess.Popen([sys.executable, "-m", "tools.fake_openai", "--port", str(port), "--batch-ms", "500"])
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline:
+        try:
+            # Any HTTP response, even a 404, means the server is up
+            httpx.get(f"http://127.0.0.1:{port}/v1/batches/ready", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise TimeoutError("Local stand-in server did not start")
+
+async def run(args, client: AsyncOpenAI):
+    cases = load_cases(args.tests.split(",") if args.tests else None, args.tag, args.inputs)
+    requests = compile_requests(cases)
+    write_batch_file(requests, args.batch_file)
+    print(f"Compiled {len(requests)} requests for {len(cases)} cases into {args.batch_file}")
+
+    batch = await submit_batch(client, args.batch_file)
+    batch = await wait_for_batch(client, batch["id"], args.poll_interval)
+    if batch["status"] != "completed":
+        print(f"Batch ended with status {batch['status']}; joining any partial results")
+
+    results = join_results(cases, await fetch_outputs(client, batch))
+    if args.judge:
+        try:
+            judged = await judge_results(client, results, args.judge_batch_file, args.poll_interval)
+            print(f"Judged {judged} comparisons")
+        except Exception as error:
+            # Keep the batch results even when judging fails
+            print(f"Judging failed: {error}")
+    with open(args.output, "w", encoding="utf-8") as output:
+        for result in results:
+            output.write(json.dumps(_without_nan(result), ensure_ascii=False) + "\n")
+    print(f"Wrote {len(results)} results to {args.output}")
+    report(results)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run test comparisons through the batch API.")
+    parser.add_argument("--tests", help="Comma-separated test keys to include (default: all)")
+    parser.add_argument("--tag", help="Only include tests with this catalog tag")
+    parser.add_argument("--inputs", help='JSONL file of extra cases: {"test": "test2", "input": "..."}')
+    parser.add_argument("--batch-file", default="bulk_requests.jsonl", help="Where to write the compiled batch file")
+    parser.add_argument("--judge-batch-file", default="bulk_judge_requests.jsonl", help="Where to write the compiled judge batch file")
+    parser.add_argument("--output", default="bulk_results.jsonl", help="Where to write joined results")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="Seconds between batch status checks")
+    parser.add_argument("--judge", action="store_true", help="Also score results against their aspects with the LLM judge")
+    parser.add_argument("--local", action="store_true", help="Use a local stand-in batch server instead of the API")
+    parser.add_argument("--local-port", type=int, default=8101)
+    args = parser.parse_args()
+
+    server = None
+    if args.local:
+        server = start_local_server(args.local_port)
+        client = AsyncOpenAI(api_key="sk-local", base_url=f"http://127.0.0.1:{args.local_port}/v1")
+        args.poll_interval = min(args.poll_interval, 0.5)
+    else:
+        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    try:
+        asyncio.run(run(args, client))
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+if __name__ == "__main__":
+    main()
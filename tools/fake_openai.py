@@ -0,0 +1,233 @@
+"""
+Fake OpenAI Server - A local stand-in for the chat completions, files and batch APIs with configurable latency.
+
+Run with:
+    python -m tools.fake_openai --port 8100 --first-token-ms 300 --token-ms 20
+
+Then point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8100/v1.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from typing import Any, Dict
+
+import uvicorn
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+FILLER_WORDS = (
+    "This is a simulated response from the local test server used to measure how the app "
+    "behaves under load without calling the real API or paying for tokens"
+).split()
+
+# Comparison headers in judge prompts (see utils/judge.py)
+JUDGE_ITEM = re.compile(r"### Comparison (\d+)\nAspects: (\[.*\])")
+
+app = FastAPI()
+app.state.settings = {"first_token_ms": 300.0, "token_ms": 20.0, "tokens": 120, "batch_ms": 2000.0}
+
+# In-memory storage for uploaded files and batches
+FILES: Dict[str, Dict[str, Any]] = {}
+BATCHES: Dict[str, Dict[str, Any]] = {}
+
+def _completion_tokens(body: Dict[str, Any]) -> int:
+    """Number of tokens to produce, capped by the request's max_tokens."""
+    return max(1, min(app.state.settings["tokens"], body.get("max_tokens") or app.state.settings["tokens"]))
+
+def _completion_text(body: Dict[str, Any], tokens: int) -> str:
+    """Build the completion text for a request."""
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        # Answer judge requests with random scores for every comparison in the prompt
+        prompt = "\n".join(message.get("content") or "" for message in body.get("messages", []))
+        rng = random.Random(prompt)
+        results = [
+            {
+                "id": int(item_id),
+                "default": {aspect: rng.randint(1, 10) for aspect in json.loads(aspects)},
+                "specialized": {aspect: rng.randint(1, 10) for aspect in json.loads(aspects)},
+                "verdict": "Simulated verdict.",
+            }
+            for item_id, aspects in JUDGE_ITEM.findall(prompt)
+        ]
+        return json.dumps({"results": results})
+    # Shuffled words with periodic sentence breaks, so stop criteria see realistic text
+    rng = random.Random(tokens)
+    words = [rng.choice(FILLER_WORDS) for _ in range(tokens)]
+    return " ".join(f"{word}." if (i + 1) % 12 == 0 else word for i, word in enumerate(words))
+
+def _chunk(completion_id: str, model: str, content: str = None, finish_reason: str = None) -> str:
+    """Format a streamed completion chunk as a server-sent event."""
+    delta = {"content": content} if content is not None else {}
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+def build_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a non-streamed chat completion response."""
+    tokens = _completion_tokens(body)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-3.5-turbo"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": _completion_text(body, tokens)},
+            "finish_reason": "length" if tokens == body.get("max_tokens") else "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens},
+    }
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    """Serve a chat completion after the configured latency."""
+    body = await request.json()
+    settings = app.state.settings
+    tokens = _completion_tokens(body)
+
+    if not body.get("stream"):
+        await asyncio.sleep((settings["first_token_ms"] + settings["token_ms"] * tokens) / 1000)
+        return JSONResponse(build_completion(body))
+
+    async def events():
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = body.get("model", "gpt-3.5-turbo")
+        await asyncio.sleep(settings["first_token_ms"] / 1000)
+        for index, word in enumerate(_completion_text(body, tokens).split(" ")):
+            if index:
+                await asyncio.sleep(settings["token_ms"] / 1000)
+            yield _chunk(completion_id, model, content=word if index == 0 else f" {word}")
+        finish_reason = "length" if tokens == body.get("max_tokens") else "stop"
+        yield _chunk(completion_id, model, finish_reason=finish_reason)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+def _store_file(content: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+    """Store a file and return its file object."""
+    file_id = f"file-{uuid.uuid4().hex}"
+    FILES[file_id] = {
+        "content": content,
+        "object": {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        },
+    }
+    return FILES[file_id]["object"]
+
+@app.post("/v1/files")
+async def upload_file(file: UploadFile = File(...), purpose: str = Form(...)):
+    """Store an uploaded file in memory."""
+    return _store_file(await file.read(), file.filename or "upload.jsonl", purpose)
+
+@app.get("/v1/files/{file_id}")
+async def retrieve_file(file_id: str):
+    if file_id not in FILES:
+        raise HTTPException(status_code=404, detail=f"No such file: {file_id}")
+    return FILES[file_id]["object"]
+
+@app.get("/v1/files/{file_id}/content")
+async def file_content(file_id: str):
+    if file_id not in FILES:
+        raise HTTPException(status_code=404, detail=f"No such file: {file_id}")
+    return Response(FILES[file_id]["content"], media_type="application/octet-stream")
+
+async def _process_batch(batch: Dict[str, Any]):
+    """Complete every request of a batch after the configured delay."""
+    batch["status"] = "in_progress"
+    batch["in_progress_at"] = int(time.time())
+    lines = FILES[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+    await asyncio.sleep(app.state.settings["batch_ms"] / 1000)
+
+    outputs, errors = [], []
+    for line in filter(str.strip, lines):
+        request = json.loads(line)
+        if request.get("url") != batch["endpoint"]:
+            errors.append({
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": request.get("custom_id"),
+                "response": None,
+                "error": {"code": "invalid_url", "message": f"Unsupported url: {request.get('url')}"},
+            })
+            continue
+        outputs.append({
+            "id": f"batch_req_{uuid.uuid4().hex}",
+            "custom_id": request["custom_id"],
+            "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": build_completion(request["body"])},
+            "error": None,
+        })
+
+    def to_jsonl(rows):
+        return "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+
+    batch["output_file_id"] = _store_file(to_jsonl(outputs), "batch_output.jsonl", "batch_output")["id"]
+    if errors:
+        batch["error_file_id"] = _store_file(to_jsonl(errors), "batch_errors.jsonl", "batch_output")["id"]
+    batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+    batch["status"] = "completed"
+    batch["completed_at"] = int(time.time())
+
+@app.post("/v1/batches")
+async def create_batch(request: Request):
+    """Create a batch and process it in the background."""
+    body = await request.json()
+    if body.get("input_file_id") not in FILES:
+        raise HTTPException(status_code=400, detail=f"No such file: {body.get('input_file_id')}")
+    batch_id = f"batch_{uuid.uuid4().hex}"
+    BATCHES[batch_id] = {
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": body.get("endpoint", "/v1/chat/completions"),
+        "input_file_id": body["input_file_id"],
+        "completion_window": body.get("completion_window", "24h"),
+        "status": "validating",
+        "output_file_id": None,
+        "error_file_id": None,
+        "created_at": int(time.time()),
+        "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        "metadata": body.get("metadata"),
+    }
+    asyncio.create_task(_process_batch(BATCHES[batch_id]))
+    return BATCHES[batch_id]
+
+@app.get("/v1/batches/{batch_id}")
+async def retrieve_batch(batch_id: str):
+    if batch_id not in BATCHES:
+        raise HTTPException(status_code=404, detail=f"No such batch: {batch_id}")
+    return BATCHES[batch_id]
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake OpenAI API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="Delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="Delay between streamed tokens")
+    parser.add_argument("--tokens", type=int, default=120, help="Tokens per completion, capped by max_tokens")
+    parser.add_argument("--batch-ms", type=float, default=2000.0, help="Time taken to complete a batch")
+    args = parser.parse_args()
+
+    app.state.settings = {
+        "first_token_ms": args.first_token_ms,
+        "token_ms": args.token_ms,
+        "tokens": args.tokens,
+        "batch_ms": args.batch_ms,
+    }
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Load Test Harness - Simulates many concurrent Chainlit sessions against the app.
+
+Each virtual user opens its own Chainlit websocket session and replays a weighted mix of
+chat messages and action clicks. Concurrency is ramped through the given levels and each
+level reports per-scenario latency percentiles, error rates, event-loop lag and server memory.
+
+Run against a self-managed app wired to the fake OpenAI server:
+    python -m tools.loadtest --spawn --users 5,10,25,50 --duration 30
+
+Or against an app that is already running:
+    python -m tools.loadtest --url http://127.0.0.1:8000 --server-pid <pid>
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import socketio
+
+from utils.catalog import get_catalog
+
+CHAT_MESSAGES = [
+    "Explain the concept of inheritance in object-oriented programming.",
+    "What is the difference between a list and a tuple in Python?",
+    "Give me three tips for writing clear documentation.",
+    "How does a hash map work?",
+    "Summarize the causes of the French Revolution in two sentences.",
+]
+
+# switch_mode flips the process-wide app mode, so it is opt-in
+DEFAULT_MIX = "chat=6,select_test=3"
+
+class VirtualUser:
+    """A single simulated Chainlit session."""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.app_errors: List[str] = []
+        self.menus_shown = 0
+        # Exceptions in app callbacks are caught by Chainlit and sent back as error messages
+        self.client.on("new_message", self._on_message)
+        self.client.on("action", self._on_action)
+
+    async def _on_message(self, message: Dict[str, Any]):
+        if message.get("isError"):
+            self.app_errors.append(str(message.get("content", "")))
+
+    async def _on_action(self, action: Dict[str, Any]):
+        if action.get("name") == "select_test":
+            self.menus_shown += 1
+
+    async def connect(self):
+        """Open the websocket session and wait for on_chat_start to finish."""
+        await self.client.connect(
+            self.url,
+            socketio_path="/ws/socket.io",
+            transports=["websocket"],
+            headers={"X-Chainlit-Session-Id": str(uuid.uuid4()), "user-env": "{}"},
+            wait_timeout=self.timeout,
+        )
+        # Acknowledgements are sent once the server-side handler returns
+        await self.client.call("connection_successful", timeout=self.timeout)
+
+    async def send_message(self, content: str):
+        """Send a chat message and wait until the app has handled it."""
+        payload = {
+            "message": {
+                "id": str(uuid.uuid4()),
+                "author": "User",
+                "authorIsUser": True,
+                "content": content,
+                "createdAt": datetime.now(timezone.utc).isoformat(),
+            },
+            "files": None,
+        }
+        await self.client.call("ui_message", payload, timeout=self.timeout)
+
+    async def call_action(self, name: str, value: str):
+        """Click an action button and wait until its callback has finished."""
+        action = {"name": name, "value": value, "id": str(uuid.uuid4()), "label": name, "description": ""}
+        await self.client.call("action_call", action, timeout=self.timeout)
+
+    async def run_scenario(self, scenario: str) -> str:
+        """Run one scenario from the mix, failing it if the app reported an error, and return the path measured."""
+        self.app_errors.clear()
+        self.menus_shown = 0
+        if scenario == "chat":
+            await self.send_message(random.choice(CHAT_MESSAGES))
+            # In test mode a chat message only re-renders the test menu, without a completion
+            if self.menus_shown:
+                scenario = "chat_test_menu"
+        elif scenario == "select_test":
+            await self.call_action("select_test", random.choice(get_catalog().keys()))
+        elif scenario == "switch_mode":
+            # Switch there and back so the session stays in the mode it started in
+            await self.call_action("switch_mode", "switch")
+            await self.call_action("switch_mode", "switch")
+        else:
+            raise ValueError(f"Unknown scenario: {scenario}")
+        if self.app_errors:
+            raise RuntimeError(f"App error: {self.app_errors[0]}")
+        return scenario
+
+    async def close(self):
+        if self.client.connected:
+            await self.client.disconnect()
+
+def parse_mix(mix: str) -> Tuple[List[str], List[float]]:
+    """Parse a scenario mix like 'chat=6,select_test=3' into names and weights."""
+    names, weights = [], []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        names.append(name.strip())
+        weights.append(float(weight or 1))
+    return names, weights
+
+def read_rss_mb(pid: Optional[int]) -> Optional[float]:
+    """Read the resident memory of a process from /proc."""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+async def monitor(url: str, pid: Optional[int], stop: asyncio.Event, stats: Dict[str, List[float]], interval: float = 0.25):
+    """Sample client loop lag, server responsiveness and server memory until stopped."""
+    async with httpx.AsyncClient(timeout=10) as http:
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            stats["client_lag_ms"].append((time.perf_counter() - start - interval) * 1000)
+
+            # A trivial HTTP request is only slow when the server's event loop is busy
+            start = time.perf_counter()
+            try:
+                await http.get(url)
+                stats["server_probe_ms"].append((time.perf_counter() - start) * 1000)
+            except httpx.HTTPError:
+                stats["server_probe_errors"].append(1)
+
+            rss = read_rss_mb(pid)
+            if rss is not None:
+                stats["server_rss_mb"].append(rss)
+
+async def user_loop(args, names: List[str], weights: List[float], deadline: float, results: Dict[str, Dict[str, list]]):
+    """Connect one virtual user and replay scenarios until the deadline."""
+    user = VirtualUser(args.url, args.timeout)
+    try:
+        start = time.perf_counter()
+        try:
+            await user.connect()
+            results["connect"]["latencies"].append(time.perf_counter() - start)
+        except Exception as error:
+            results["connect"]["errors"].append(repr(error))
+            return
+
+        while time.perf_counter() < deadline:
+            scenario = random.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                path = await user.run_scenario(scenario)
+                results[path]["latencies"].append(time.perf_counter() - start)
+            except Exception as error:
+                results[scenario]["errors"].append(repr(error))
+            await asyncio.sleep(random.uniform(0, args.think_time))
+    finally:
+        await user.close()
+
+def summarize(values: List[float], scale: float = 1.0) -> str:
+    """Format p50/p95/p99/max of a list of values."""
+    if not values:
+        return "-"
+    p50, p95, p99 = np.percentile(np.asarray(values) * scale, [50, 95, 99])
+    return f"{p50:.0f} / {p95:.0f} / {p99:.0f} / {max(values) * scale:.0f}"
+
+def report(users: int, names: List[str], results: Dict[str, Dict[str, list]], stats: Dict[str, List[float]], elapsed: float):
+    """Print the results of one concurrency level."""
+    print(f"\n## {users} concurrent users ({elapsed:.0f}s)\n")
+    print("| Scenario | Requests | Errors | Error Rate | Latency ms p50 / p95 / p99 / max |")
+    print("|:---------|:---------|:-------|:-----------|:---------------------------------|")
+    for scenario in ["connect"] + names:
+        ok, errors = len(results[scenario]["latencies"]), len(results[scenario]["errors"])
+        total = ok + errors
+        rate = errors / total if total else 0.0
+        print(f"| {scenario} | {total} | {errors} | {rate:.1%} | {summarize(results[scenario]['latencies'], 1000)} |")
+
+    completed = sum(len(results[scenario]["latencies"]) for scenario in names)
+    print(f"\nThroughput: {completed / elapsed:.2f} scenarios/s")
+    print(f"Server probe ms (p50 / p95 / p99 / max): {summarize(stats['server_probe_ms'])}, errors: {len(stats['server_probe_errors'])}")
+    print(f"Client loop lag ms (p50 / p95 / p99 / max): {summarize(stats['client_lag_ms'])}")
+    if stats["server_rss_mb"]:
+        print(f"Server RSS MB: start {stats['server_rss_mb'][0]:.0f}, peak {max(stats['server_rss_mb']):.0f}, end {stats['server_rss_mb'][-1]:.0f}")
+
+    for scenario in ["connect"] + names:
+        for error in sorted(set(results[scenario]["errors"]))[:3]:
+            print(f"  {scenario} error: {error}")
+
+async def run_level(args, users: int, names: List[str], weights: List[float]):
+    """Run one concurrency level and report it."""
+    # Chat messages answered with the test menu are reported apart from real completions
+    scenarios = names + (["chat_test_menu"] if "chat" in names else [])
+    results = {scenario: {"latencies": [], "errors": []} for scenario in ["connect"] + scenarios}
+    stats = {"client_lag_ms": [], "server_probe_ms": [], "server_probe_errors": [], "server_rss_mb": []}
+    stop = asyncio.Event()
+    monitor_task = asyncio.create_task(monitor(args.url, args.server_pid, stop, stats))
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    tasks = []
+    for _ in range(users):
+        tasks.append(asyncio.create_task(user_loop(args, names, weights, deadline, results)))
+        # Stagger connections so the ramp itself is not a thundering herd
+        await asyncio.sleep(args.ramp_interval)
+    await asyncio.gather(*tasks)
+
+    stop.set()
+    await monitor_task
+    report(users, scenarios, results, stats, time.perf_counter() - start)
+
+def spawn_servers(args) -> List[subprocess.Popen]:
+    """Start the fake OpenAI server and the app wired to it."""
+    fake_port = args.fake_port
+    fake = subprocess.Popen([
+        sys.executable, "-m", "tools.fake_openai", "--port", str(fake_port),
+        "--first-token-ms", str(args.first_token_ms), "--token-ms", str(args.token_ms), "--tokens", str(args.tokens),
+    ])
+    env = dict(os.environ, OPENAI_BASE_URL=f"http://127.0.0.1:{fake_port}/v1", OPENAI_API_KEY="sk-loadtest")
+    port = args.url.rsplit(":", 1)[-1].strip("/")
+    app = subprocess.Popen([sys.executable, "-m", "chainlit", "run", "app.py", "--headless", "--port", port], env=env)
+    args.server_pid = app.pid
+    return [fake, app]
+
+async def wait_for_server(url: str, timeout: float = 60.0):
+    """Wait until the app answers HTTP requests."""
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(timeout=5) as http:
+        while time.perf_counter() < deadline:
+            try:
+                await http.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.5)
+    raise TimeoutError(f"Server at {url} did not start within {timeout:.0f}s")
+
+async def run(args):
+    names, weights = parse_mix(args.mix)
+    await wait_for_server(args.url)
+    for users in [int(level) for level in args.users.split(",")]:
+        await run_level(args, users, names, weights)
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent Chainlit sessions against the app.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running app")
+    parser.add_argument("--users", default="1,5,10,25,50", help="Comma-separated concurrency levels to ramp through")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run each concurrency level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted scenarios: chat, select_test, switch_mode")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Maximum random pause between scenarios")
+    parser.add_argument("--ramp-interval", type=float, default=0.05, help="Delay between connecting users")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-scenario timeout in seconds")
+    parser.add_argument("--server-pid", type=int, help="PID of the app process, for memory sampling")
+    parser.add_argument("--spawn", action="store_true", help="Start the app and a fake OpenAI server locally")
+    parser.add_argument("--fake-port", type=int, default=8100)
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--tokens", type=int, default=120)
+    args = parser.parse_args()
+
+    processes = spawn_servers(args) if args.spawn else []
+    try:
+        asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+if __name__ == "__main__":
+    main()
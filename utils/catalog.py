@@ -0,0 +1,195 @@
+"""
+Catalog Module - Indexes test cases from config.py and an external directory of YAML/JSON files.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import yaml
+from config import TEST_CONFIG, CATALOG_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Keys of TEST_CONFIG that are not test configurations
+NON_TEST_KEYS = {"settings", "enabled", "auto_test", "log_level"}
+
+REQUIRED_FIELDS = ("template", "label", "description", "aspects", "example", "templates")
+CATALOG_EXTENSIONS = (".yaml", ".yml", ".json")
+
+_catalog: Optional["TestCatalog"] = None
+
+def _is_str_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _stop_problem(stop: Any) -> Optional[str]:
+    """Describe why a 'stop' mapping cannot build stop criteria, or None if it can."""
+    if not isinstance(stop, dict):
+        return "'stop' must be a mapping"
+    for field in ("max_words", "max_sentences"):
+        value = stop.get(field, 1)
+        if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+            return f"'stop.{field}' must be a positive integer"
+    if not _is_number(stop.get("max_seconds", 1)) or stop.get("max_seconds", 1) <= 0:
+        return "'stop.max_seconds' must be a positive number"
+    sentinels = stop.get("sentinels", [])
+    if not _is_str_list(sentinels):
+        return "'stop.sentinels' must be a list of regular expressions"
+    for pattern in sentinels:
+        try:
+            re.compile(pattern)
+        except re.error as error:
+            return f"invalid sentinel /{pattern}/: {error}"
+    return None
+
+def _problem(test_config: Any) -> Optional[str]:
+    """Describe why a catalog entry is not a usable test configuration, or None if it is."""
+    if not isinstance(test_config, dict):
+        return "expected a mapping of test fields"
+    missing = [field for field in REQUIRED_FIELDS if field not in test_config]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    for field in ("template", "label", "description", "example"):
+        if not isinstance(test_config[field], str):
+            return f"'{field}' must be a string"
+    templates = test_config["templates"]
+    if not isinstance(templates, dict) or not all(isinstance(templates.get(name), str) for name in ("system", "user")):
+        return "templates need 'system' and 'user' strings"
+    try:
+        templates["user"].format(input="")
+    except (AttributeError, IndexError, KeyError, ValueError) as error:
+        return f"user template must only use the {{input}} placeholder ({type(error).__name__}: {error})"
+    if not _is_str_list(test_config["aspects"]):
+        return "'aspects' must be a list of strings"
+    for field in ("tags", "metrics"):
+        if not _is_str_list(test_config.get(field, [])):
+            return f"'{field}' must be a list of strings"
+    expected_numbers = test_config.get("expected_numbers", [])
+    if not isinstance(expected_numbers, list) or not all(_is_number(item) for item in expected_numbers):
+        return "'expected_numbers' must be a list of numbers"
+    return _stop_problem(test_config.get("stop", {}))
+
+def _parse_file(path: str) -> Dict[str, Dict[str, Any]]:
+    """Parse a catalog file mapping test keys to test configurations."""
+    with open(path, encoding="utf-8") as catalog_file:
+        data = json.load(catalog_file) if path.endswith(".json") else yaml.safe_load(catalog_file)
+    if not isinstance(data, dict):
+        raise ValueError("expected a mapping of test keys to test configurations")
+
+    tests = {}
+    for key, test_config in data.items():
+        problem = _problem(test_config)
+        if problem:
+            logger.warning("Skipping test %r in %s: %s", key, path, problem)
+            continue
+        tests[str(key)] = test_config
+    return tests
+
+class TestCatalog:
+    """Test cases indexed by key, tag and aspect, loaded on first use and reloaded when files change."""
+
+    def __init__(self, path: str, reload_interval: float):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.builtin = {key: value for key, value in TEST_CONFIG.items() if key not in NON_TEST_KEYS}
+        self.files: Dict[str, Tuple[float, List[str]]] = {}  # path -> (mtime, keys)
+        self.file_tests: Dict[str, Dict[str, Any]] = {}
+        self.tests: Dict[str, Dict[str, Any]] = {}
+        self.by_tag: Dict[str, Set[str]] = {}
+        self.by_aspect: Dict[str, Set[str]] = {}
+        self.last_scan: Optional[float] = None
+
+    def _catalog_files(self) -> Dict[str, float]:
+        """List catalog files with their modification times."""
+        if not os.path.isdir(self.path):
+            return {}
+        files = {}
+        for name in sorted(os.listdir(self.path)):
+            if name.endswith(CATALOG_EXTENSIONS):
+                path = os.path.join(self.path, name)
+                files[path] = os.stat(path).st_mtime
+        return files
+
+    def _refresh(self):
+        """Parse new or changed files and rebuild the indexes, at most once per reload interval."""
+        now = time.monotonic()
+        if self.last_scan is not None and now - self.last_scan < self.reload_interval:
+            return
+        self.last_scan = now
+
+        current = self._catalog_files()
+        changed = False
+        for path in set(self.files) - set(current):
+            for key in self.files.pop(path)[1]:
+                self.file_tests.pop(key, None)
+            changed = True
+
+        for path, mtime in current.items():
+            if path in self.files and self.files[path][0] == mtime:
+                continue
+            try:
+                tests = _parse_file(path)
+            except (OSError, TypeError, ValueError, yaml.YAMLError) as error:
+                # Keep serving the last good version of a file that fails to parse
+                logger.warning("Could not load catalog file %s: %s", path, error)
+                continue
+            for key in self.files.get(path, (0, []))[1]:
+                self.file_tests.pop(key, None)
+            self.file_tests.update(tests)
+            self.files[path] = (mtime, list(tests))
+            changed = True
+
+        if changed or not self.tests:
+            self._reindex()
+
+    def _reindex(self):
+        """Merge built-in and file tests and rebuild the tag and aspect indexes."""
+        # Catalog files may override built-in tests with the same key
+        self.tests = {**self.builtin, **self.file_tests}
+        self.by_tag, self.by_aspect = {}, {}
+        for key, test_config in self.tests.items():
+            for tag in test_config.get("tags", []):
+                self.by_tag.setdefault(tag, set()).add(key)
+            for aspect in test_config["aspects"]:
+                self.by_aspect.setdefault(aspect, set()).add(key)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a test configuration by key."""
+        self._refresh()
+        return self.tests.get(key)
+
+    def keys(self, tag: Optional[str] = None, aspect: Optional[str] = None) -> List[str]:
+        """List test keys in catalog order, optionally filtered by tag and aspect."""
+        self._refresh()
+        keys = list(self.tests)
+        if tag:
+            keys = [key for key in keys if key in self.by_tag.get(tag, set())]
+        if aspect:
+            keys = [key for key in keys if key in self.by_aspect.get(aspect, set())]
+        return keys
+
+    def tags(self) -> List[str]:
+        """List all tags, most used first."""
+        self._refresh()
+        return sorted(self.by_tag, key=lambda tag: (-len(self.by_tag[tag]), tag))
+
+    def page(self, page: int, page_size: int, tag: Optional[str] = None) -> Tuple[List[str], int]:
+        """Return one page of test keys and the total number of pages."""
+        keys = self.keys(tag=tag)
+        pages = max(math.ceil(len(keys) / page_size), 1)
+        page = min(max(page, 0), pages - 1)
+        return keys[page * page_size:(page + 1) * page_size], pages
+
+def get_catalog() -> TestCatalog:
+    """Get the shared test catalog, creating it on first use."""
+    global _catalog
+    if _catalog is None:
+        _catalog = TestCatalog(CATALOG_CONFIG["path"], CATALOG_CONFIG["reload_interval"])
+    return _catalog
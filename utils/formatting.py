@@ -22,4 +22,10 @@ def format_template_text(text: str) -> str:
     if current_line:
         lines.append(" ".join(current_line))
     
-    return "<br>".join(lines) 
\ No newline at end of file
+    return "<br>".join(lines)
+
+def format_metric(value: float) -> str:
+    """Format a metric value for table display."""
+    if value != value:  # NaN means the metric does not apply
+        return "n/a"
+    return f"{value:.2f}"
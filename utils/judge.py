@@ -0,0 +1,138 @@
+"""
+Judge Module - Scores comparisons against their aspects with batched LLM-as-judge calls.
+"""
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+from openai import AsyncOpenAI
+from config import JUDGE_CONFIG
+from utils.length_model import count_tokens
+
+logger = logging.getLogger(__name__)
+
+JUDGE_SYSTEM_TEMPLATE = """You are an impartial evaluator of AI assistant responses.
+For every comparison you receive, score the "default" and the "specialized" response on each listed aspect
+from 1 (poor) to {scale} (excellent), then give a one-sentence verdict.
+
+Reply with a single JSON object of this form:
+{{"results": [{{"id": <comparison id>, "default": {{"<aspect>": <score>, ...}}, "specialized": {{"<aspect>": <score>, ...}}, "verdict": "<one sentence>"}}]}}
+Include exactly one result per comparison id and use the aspect names exactly as given."""
+
+# A comparison to judge: (aspects, input text, default response, specialized response)
+JudgeItem = Tuple[List[str], str, str, str]
+
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+def _count_tokens(text: str) -> int:
+    """Count tokens for the judge model."""
+    return count_tokens(text, JUDGE_CONFIG["model"])
+
+def judge_key(item: JudgeItem) -> str:
+    """Hash a comparison so identical responses are only judged once."""
+    payload = json.dumps([JUDGE_CONFIG["model"], *item], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _format_item(item_id: int, item: JudgeItem) -> str:
+    """Format a single comparison for the judge prompt."""
+    aspects, input_text, default_response, specialized_response = item
+    return (
+        f"### Comparison {item_id}\n"
+        f"Aspects: {json.dumps(aspects)}\n"
+        f"Input:\n{input_text}\n\n"
+        f"Default response:\n{default_response}\n\n"
+        f"Specialized response:\n{specialized_response}\n"
+    )
+
+def pack_items(items: List[JudgeItem], indices: List[int]) -> List[List[int]]:
+    """Greedily pack comparisons into groups that fit the judge token budget."""
+    budget = JUDGE_CONFIG["max_prompt_tokens"] - _count_tokens(JUDGE_SYSTEM_TEMPLATE)
+    groups: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for index in indices:
+        cost = _count_tokens(_format_item(index, items[index]))
+        if current and (used + cost > budget or len(current) >= JUDGE_CONFIG["max_batch"]):
+            groups.append(current)
+            current, used = [], 0
+        # Oversized comparisons still get judged, just on their own
+        current.append(index)
+        used += cost
+    if current:
+        groups.append(current)
+    return groups
+
+def parse_results(content: str, items: List[JudgeItem], group: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Parse the judge reply, keeping only well-formed results for the requested ids."""
+    try:
+        results = json.loads(content).get("results", [])
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+
+    parsed = {}
+    for result in results:
+        if not isinstance(result, dict) or not isinstance(result.get("id"), int) or result["id"] not in group:
+            continue
+        aspects = items[result["id"]][0]
+        try:
+            parsed[result["id"]] = {
+                "default": {aspect: float(result["default"][aspect]) for aspect in aspects},
+                "specialized": {aspect: float(result["specialized"][aspect]) for aspect in aspects},
+                "verdict": str(result.get("verdict", "")),
+            }
+        except (KeyError, TypeError, ValueError):
+            continue
+    return parsed
+
+def judge_request(items: List[JudgeItem], group: List[int]) -> Dict[str, Any]:
+    """Build the structured completion request that judges a group of comparisons."""
+    aspect_count = sum(len(items[index][0]) for index in group)
+    return {
+        "model": JUDGE_CONFIG["model"],
+        "messages": [
+            {"role": "system", "content": JUDGE_SYSTEM_TEMPLATE.format(scale=JUDGE_CONFIG["scale"])},
+            {"role": "user", "content": "\n".join(_format_item(index, items[index]) for index in group)}
+        ],
+        "temperature": 0,
+        "max_tokens": 60 * len(group) + 2 * JUDGE_CONFIG["tokens_per_aspect"] * aspect_count,
+        "response_format": {"type": "json_object"},
+    }
+
+async def _judge_group(client: AsyncOpenAI, items: List[JudgeItem], group: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Judge a group of comparisons in one structured completion."""
+    response = await client.chat.completions.create(**judge_request(items, group))
+    return parse_results(response.choices[0].message.content or "", items, group)
+
+async def judge_comparisons(client: AsyncOpenAI, items: List[JudgeItem]) -> List[Optional[Dict[str, Any]]]:
+    """Score comparisons against their aspects, packing uncached ones into as few calls as possible."""
+    keys = [judge_key(item) for item in items]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+    # Identical comparisons in the same batch share a single judgement
+    pending: Dict[str, int] = {}
+    for index, key in enumerate(keys):
+        if key in _cache:
+            _cache.move_to_end(key)
+            results[index] = _cache[key]
+        else:
+            pending.setdefault(key, index)
+
+    for group in pack_items(items, list(pending.values())):
+        try:
+            judgements = await _judge_group(client, items, group)
+        except Exception as error:
+            # One failed call only leaves its own comparisons unjudged
+            logger.warning("Judge call for %d comparisons failed: %s", len(group), error)
+            continue
+        for index, judgement in judgements.items():
+            _cache[keys[index]] = judgement
+            while len(_cache) > JUDGE_CONFIG["cache_size"]:
+                _cache.popitem(last=False)
+
+    for index, key in enumerate(keys):
+        if results[index] is None:
+            results[index] = _cache.get(key)
+    return results
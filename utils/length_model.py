@@ -0,0 +1,128 @@
+"""
+Length Model Module - Sizes max_tokens from the observed output lengths of each test and model.
+"""
+
+import math
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+import tiktoken
+from config import LENGTH_CONFIG
+
+# Geometric bucket edges from 1 to 16k tokens, roughly 5% apart
+BUCKET_EDGES = np.unique(np.round(np.geomspace(1, 16384, 200))).astype(np.int64)
+
+_model: Optional["OutputLengthModel"] = None
+
+@lru_cache(maxsize=None)
+def _encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """Load the tokenizer for a model, or None when it cannot be loaded."""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Encodings are downloaded on first use, which fails on offline hosts
+        return None
+
+def count_tokens(text: str, model: str) -> int:
+    """Count the completion tokens of a response."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+class QuantileSketch:
+    """Decayed histogram over geometric buckets, giving approximate quantiles in bounded memory."""
+
+    def __init__(self, decay: float):
+        self.decay = decay
+        self.counts = np.zeros(len(BUCKET_EDGES), dtype=np.float64)
+        self.samples = 0
+
+    def add(self, value: int):
+        """Record an observation, fading older ones."""
+        self.counts *= self.decay
+        bucket = min(int(np.searchsorted(BUCKET_EDGES, max(value, 1))), len(BUCKET_EDGES) - 1)
+        self.counts[bucket] += 1
+        self.samples += 1
+
+    def quantile(self, q: float) -> int:
+        """Return the upper bucket edge below which a share q of the observations falls."""
+        cumulative = np.cumsum(self.counts)
+        bucket = int(np.searchsorted(cumulative, q * cumulative[-1]))
+        return int(BUCKET_EDGES[min(bucket, len(BUCKET_EDGES) - 1)])
+
+class LengthStats:
+    """Output length history and truncation feedback for one test and model."""
+
+    def __init__(self):
+        self.sketch = QuantileSketch(LENGTH_CONFIG["decay"])
+        self.truncation_rate = 0.0
+        self.headroom = LENGTH_CONFIG["headroom"]
+
+    def record(self, tokens: int, truncated: bool):
+        """Record a completion and tighten or relax the headroom."""
+        self.sketch.add(tokens)
+        # Only responses whose max_tokens was sized from history, not the ceiling, say anything about the headroom
+        if self.sketch.samples <= LENGTH_CONFIG["min_samples"]:
+            return
+        weight = 1 - LENGTH_CONFIG["decay"]
+        self.truncation_rate = (1 - weight) * self.truncation_rate + weight * float(truncated)
+
+        # Truncated responses were cut short, so their true length is unknown: widen quickly
+        low, high = LENGTH_CONFIG["headroom_range"]
+        if truncated or self.truncation_rate > LENGTH_CONFIG["target_truncation"]:
+            self.headroom = min(self.headroom * 1.1, high)
+        elif self.truncation_rate < LENGTH_CONFIG["target_truncation"] / 4:
+            self.headroom = max(self.headroom * 0.99, low)
+
+    def max_tokens(self, ceiling: int) -> int:
+        """Recommend max_tokens, never above the configured ceiling."""
+        if self.sketch.samples < LENGTH_CONFIG["min_samples"]:
+            return ceiling
+        estimate = math.ceil(self.sketch.quantile(LENGTH_CONFIG["quantile"]) * self.headroom)
+        return int(min(max(estimate, LENGTH_CONFIG["min_tokens"]), ceiling))
+
+class OutputLengthModel:
+    """Per-test, per-model output length statistics used to size max_tokens."""
+
+    def __init__(self):
+        self.stats: Dict[Tuple[str, str], LengthStats] = {}
+
+    def _get(self, key: str, model: str) -> LengthStats:
+        if (key, model) not in self.stats:
+            self.stats[(key, model)] = LengthStats()
+        return self.stats[(key, model)]
+
+    def apply(self, key: str, model: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of the settings with max_tokens sized from history."""
+        settings = settings.copy()
+        if LENGTH_CONFIG["enabled"] and "max_tokens" in settings:
+            settings["max_tokens"] = self._get(key, model).max_tokens(settings["max_tokens"])
+        return settings
+
+    def record(self, key: str, model: str, text: str, finish_reason: Optional[str]):
+        """Record the length of a completed response."""
+        if not LENGTH_CONFIG["enabled"]:
+            return
+        self._get(key, model).record(count_tokens(text, model), finish_reason == "length")
+
+    def report(self, key: str, model: str) -> Dict[str, Any]:
+        """Summarize the history behind the max_tokens recommendation."""
+        stats = self._get(key, model)
+        return {
+            "samples": stats.sketch.samples,
+            "quantile": stats.sketch.quantile(LENGTH_CONFIG["quantile"]) if stats.sketch.samples else None,
+            "headroom": stats.headroom,
+            "truncation_rate": stats.truncation_rate,
+        }
+
+def get_length_model() -> OutputLengthModel:
+    """Get the shared output length model, creating it on first use."""
+    global _model
+    if _model is None:
+        _model = OutputLengthModel()
+    return _model
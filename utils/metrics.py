@@ -0,0 +1,177 @@
+"""
+Metrics Module - Computes local, heuristic quality metrics for response comparisons.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+from config import METRICS_CONFIG
+
+WORD_PATTERN = re.compile(r"[A-Za-z0-9']+")
+SENTENCE_PATTERN = re.compile(r"[^.!?]+[.!?]*")
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "been", "but", "by", "for", "from", "had",
+    "has", "have", "he", "her", "his", "i", "in", "into", "is", "it", "its", "more", "of",
+    "on", "or", "she", "so", "than", "that", "the", "their", "them", "then", "there", "these",
+    "they", "this", "to", "was", "we", "were", "what", "when", "which", "who", "will", "with",
+    "you", "your"
+}
+
+METRIC_LABELS = {
+    "readability": "Readability (Flesch)",
+    "avg_sentence_length": "Avg Sentence Length",
+    "sentence_length_stdev": "Sentence Length Std Dev",
+    "compression_ratio": "Compression Ratio",
+    "key_term_overlap": "Key-Term Overlap",
+    "lexical_diversity": "Lexical Diversity",
+    "numeric_answer": "Numeric Answer Match",
+    "numbers_found": "Numbers Found",
+}
+
+# A comparison to score: (metric names, input text, default response, specialized response, expected numbers)
+Comparison = Tuple[List[str], str, str, str, Optional[List[float]]]
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def _words(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return [word.lower() for word in WORD_PATTERN.findall(text)]
+
+def _sentence_lengths(text: str) -> List[int]:
+    """Return the word count of each sentence in the text."""
+    lengths = [len(WORD_PATTERN.findall(sentence)) for sentence in SENTENCE_PATTERN.findall(text)]
+    return [length for length in lengths if length > 0]
+
+def _syllables(word: str) -> int:
+    """Estimate the number of syllables in a word."""
+    count = len(VOWEL_GROUPS.findall(word))
+    if word.endswith("e") and count > 1:
+        count -= 1
+    return max(count, 1)
+
+def _numeric_match(text: str, expected: Optional[List[float]]) -> Tuple[float, int]:
+    """Check the numbers in a response against the expected answer."""
+    numbers = [float(number) for number in NUMBER_PATTERN.findall(text)]
+    if not expected:
+        return float("nan"), len(numbers)
+    # Answers are usually stated last, so only consider the tail of the response
+    tail = numbers[-max(len(expected) * 3, 3):]
+    remaining = list(tail)
+    matched = 0
+    for value in expected:
+        if value in remaining:
+            remaining.remove(value)
+            matched += 1
+    return matched / len(expected), len(numbers)
+
+def score_batch(comparisons: List[Comparison], key_terms: int = 10) -> List[Dict[str, Dict[str, float]]]:
+    """Score a batch of comparisons, vectorizing the arithmetic over all texts at once."""
+    if not comparisons:
+        return []
+
+    # Rows 0..n-1 are default responses, n..2n-1 specialized responses, 2n..3n-1 inputs
+    n = len(comparisons)
+    texts = [c[2] for c in comparisons] + [c[3] for c in comparisons] + [c[1] for c in comparisons]
+    tokens = [_words(text) for text in texts]
+
+    # Term-count matrix over the batch vocabulary
+    vocabulary: Dict[str, int] = {}
+    for words in tokens:
+        for word in words:
+            vocabulary.setdefault(word, len(vocabulary))
+    counts = np.zeros((len(texts), max(len(vocabulary), 1)), dtype=np.float32)
+    for row, words in enumerate(tokens):
+        if words:
+            np.add.at(counts[row], [vocabulary[word] for word in words], 1)
+
+    word_totals = counts.sum(axis=1)
+    safe_words = np.maximum(word_totals, 1)
+    unique_totals = (counts > 0).sum(axis=1)
+
+    sentence_lengths = [_sentence_lengths(text) for text in texts[:2 * n]]
+    sentence_counts = np.array([max(len(lengths), 1) for lengths in sentence_lengths], dtype=np.float32)
+    sentence_stdev = np.array([np.std(lengths) if lengths else 0.0 for lengths in sentence_lengths], dtype=np.float32)
+    syllable_totals = np.array([sum(_syllables(word) for word in words) for words in tokens[:2 * n]], dtype=np.float32)
+
+    response_words = safe_words[:2 * n]
+    avg_sentence_length = word_totals[:2 * n] / sentence_counts
+    readability = 206.835 - 1.015 * avg_sentence_length - 84.6 * (syllable_totals / response_words)
+    readability = np.where(word_totals[:2 * n] > 0, readability, np.nan)
+    lexical_diversity = unique_totals[:2 * n] / response_words
+    input_words = np.tile(safe_words[2 * n:], 2)
+    compression_ratio = word_totals[:2 * n] / input_words
+
+    # Key terms are the most frequent non-stopword terms of each input
+    stop_columns = [index for word, index in vocabulary.items() if word in STOPWORDS or len(word) < 3]
+    input_counts = counts[2 * n:].copy()
+    input_counts[:, stop_columns] = 0
+    top_terms = np.argsort(-input_counts, axis=1, kind="stable")[:, :key_terms]
+    top_mask = np.take_along_axis(input_counts, top_terms, axis=1) > 0
+    present = np.take_along_axis(counts[:2 * n] > 0, np.tile(top_terms, (2, 1)), axis=1)
+    overlap_hits = (present & np.tile(top_mask, (2, 1))).sum(axis=1)
+    key_term_overlap = overlap_hits / np.maximum(np.tile(top_mask.sum(axis=1), 2), 1)
+
+    numeric = [_numeric_match(texts[row], comparisons[row % n][4]) for row in range(2 * n)]
+
+    columns = {
+        "readability": readability,
+        "avg_sentence_length": avg_sentence_length,
+        "sentence_length_stdev": sentence_stdev,
+        "compression_ratio": compression_ratio,
+        "key_term_overlap": key_term_overlap,
+        "lexical_diversity": lexical_diversity,
+        "numeric_answer": np.array([match for match, _ in numeric], dtype=np.float32),
+        "numbers_found": np.array([found for _, found in numeric], dtype=np.float32),
+    }
+
+    results = []
+    for index, comparison in enumerate(comparisons):
+        names = [name for name in comparison[0] if name in columns]
+        results.append({
+            "default": {name: float(columns[name][index]) for name in names},
+            "specialized": {name: float(columns[name][n + index]) for name in names},
+        })
+    return results
+
+def build_comparison(test_config: Dict[str, Any], input_text: str, default_response: str, specialized_response: str) -> Comparison:
+    """Build a comparison tuple for scoring from a test configuration."""
+    # Expected numbers only apply to the test's own example input
+    expected = test_config.get("expected_numbers") if input_text == test_config.get("example") else None
+    return (test_config.get("metrics", []), input_text, default_response, specialized_response, expected)
+
+def _exit_with_parent(parent_pid: int):
+    """Exit a pool worker once its parent is gone."""
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(1)
+        os._exit(0)
+    threading.Thread(target=watch, daemon=True).start()
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the shared process pool, creating it on first use."""
+    global _pool
+    if _pool is None and METRICS_CONFIG["max_workers"] > 0:
+        # Chainlit shuts down with os._exit(), so the pool is never shut down cleanly and
+        # workers forked from the threaded server can hang; spawn them and let them watch the server
+        _pool = ProcessPoolExecutor(
+            max_workers=METRICS_CONFIG["max_workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_exit_with_parent,
+            initargs=(os.getpid(),)
+        )
+    return _pool
+
+async def score_comparisons(comparisons: List[Comparison]) -> List[Dict[str, Dict[str, float]]]:
+    """Score comparisons off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), score_batch, comparisons, METRICS_CONFIG["key_terms"])
@@ -0,0 +1,76 @@
+"""
+Prompts Module - Builds the default and specialized requests for a test input.
+"""
+
+from typing import Dict, List, Any, Tuple
+from config import CHAT_CONFIG
+from utils.stop_criteria import budget_instruction
+
+# Parameter adjustments for the aspects being tested
+ASPECT_PARAMS = {
+    # Creativity-related aspects
+    "creativity": {"temperature": 0.9, "top_p": 0.9},
+    "uniqueness": {"temperature": 0.9, "presence_penalty": 0.6},
+    "humor": {"temperature": 0.8, "frequency_penalty": 0.3},
+    
+    # Accuracy-related aspects
+    "accuracy": {"temperature": 0.5, "top_p": 0.8},
+    "mathematical accuracy": {"temperature": 0.3, "top_p": 0.9},
+    
+    # Structure and clarity aspects
+    "clarity": {"temperature": 0.6, "presence_penalty": 0.2},
+    "step-by-step explanation": {"temperature": 0.4, "frequency_penalty": 0.3},
+    "structure": {"temperature": 0.5, "presence_penalty": 0.4},
+    
+    # Conciseness aspects
+    "conciseness": {"max_tokens": 800, "presence_penalty": 0.4},
+    "key point retention": {"temperature": 0.5, "presence_penalty": 0.3},
+    
+    # Style aspects
+    "tone accuracy": {"temperature": 0.7, "presence_penalty": 0.4},
+    "professionalism": {"temperature": 0.6, "frequency_penalty": 0.2},
+    
+    # Engagement aspects
+    "engagement": {"temperature": 0.8, "presence_penalty": 0.3},
+    "use of examples": {"temperature": 0.7, "presence_penalty": 0.4},
+    
+    # Understanding aspects
+    "simplicity": {"temperature": 0.5, "top_p": 0.8},
+    "understandability": {"temperature": 0.6, "frequency_penalty": 0.2}
+}
+
+def adjust_settings_for_aspects(base_settings: Dict[str, Any], aspects: List[str]) -> Dict[str, Any]:
+    """Adjust API parameters based on the aspects being tested."""
+    settings = base_settings.copy()
+    param_counts = {"temperature": 0, "top_p": 0, "max_tokens": 0, "frequency_penalty": 0, "presence_penalty": 0}
+    param_sums = param_counts.copy()
+    
+    for aspect in aspects:
+        if aspect in ASPECT_PARAMS:
+            for param, value in ASPECT_PARAMS[aspect].items():
+                param_sums[param] += value
+                param_counts[param] += 1
+    
+    for param in param_counts:
+        if param_counts[param] > 0:
+            value = param_sums[param] / param_counts[param]
+            settings[param] = int(value) if param == "max_tokens" else value
+    
+    return settings
+
+def build_messages(test_config: Dict[str, Any], content: str) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """Build the default and specialized messages for a test input."""
+    default_messages = [
+        {"role": "system", "content": CHAT_CONFIG["system_template"]},
+        {"role": "user", "content": content}
+    ]
+    
+    # The specialized prompt states the length budgets its stop criteria enforce
+    specialized_user = test_config["templates"]["user"].format(input=content)
+    budget = budget_instruction(test_config)
+    specialized_messages = [
+        {"role": "system", "content": test_config["templates"]["system"]},
+        {"role": "user", "content": f"{specialized_user}\n\n{budget}" if budget else specialized_user}
+    ]
+    
+    return default_messages, specialized_messages
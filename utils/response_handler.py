@@ -2,46 +2,23 @@
 Response Handler Module - Manages LLM API interactions and response processing.
 """
 
+import asyncio
+import logging
 import os
+import time
 from typing import Dict, List, Any, Tuple, Optional
 from openai import AsyncOpenAI
 import chainlit as cl
-from config import TEST_CONFIG, CHAT_CONFIG
+from config import APP_CONFIG, TEST_CONFIG, CHAT_CONFIG, METRICS_CONFIG, JUDGE_CONFIG
 from utils.ui import stream_comparison_message
 from utils.formatting import format_template_text
+from utils.prompts import adjust_settings_for_aspects, build_messages
+from utils.metrics import build_comparison, score_comparisons
+from utils.judge import judge_comparisons
+from utils.stop_criteria import StopCriterion, WallClock, build_stop_criteria
+from utils.length_model import get_length_model
 
-# Constants moved from test_mode.py
-ASPECT_PARAMS = {
-    # Creativity-related aspects
-    "creativity": {"temperature": 0.9, "top_p": 0.9},
-    "uniqueness": {"temperature": 0.9, "presence_penalty": 0.6},
-    "humor": {"temperature": 0.8, "frequency_penalty": 0.3},
-    
-    # Accuracy-related aspects
-    "accuracy": {"temperature": 0.5, "top_p": 0.8},
-    "mathematical accuracy": {"temperature": 0.3, "top_p": 0.9},
-    
-    # Structure and clarity aspects
-    "clarity": {"temperature": 0.6, "presence_penalty": 0.2},
-    "step-by-step explanation": {"temperature": 0.4, "frequency_penalty": 0.3},
-    "structure": {"temperature": 0.5, "presence_penalty": 0.4},
-    
-    # Conciseness aspects
-    "conciseness": {"max_tokens": 800, "presence_penalty": 0.4},
-    "key point retention": {"temperature": 0.5, "presence_penalty": 0.3},
-    
-    # Style aspects
-    "tone accuracy": {"temperature": 0.7, "presence_penalty": 0.4},
-    "professionalism": {"temperature": 0.6, "frequency_penalty": 0.2},
-    
-    # Engagement aspects
-    "engagement": {"temperature": 0.8, "presence_penalty": 0.3},
-    "use of examples": {"temperature": 0.7, "presence_penalty": 0.4},
-    
-    # Understanding aspects
-    "simplicity": {"temperature": 0.5, "top_p": 0.8},
-    "understandability": {"temperature": 0.6, "frequency_penalty": 0.2}
-}
+logger = logging.getLogger(__name__)
 
 PARAM_IMPACTS = {
     "Temperature": {
@@ -70,43 +47,74 @@ def create_client() -> AsyncOpenAI:
     """Create a new OpenAI client instance."""
     return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def adjust_settings_for_aspects(base_settings: Dict[str, Any], aspects: List[str]) -> Dict[str, Any]:
-    """Adjust API parameters based on the aspects being tested."""
-    settings = base_settings.copy()
-    param_counts = {"temperature": 0, "top_p": 0, "max_tokens": 0, "frequency_penalty": 0, "presence_penalty": 0}
-    param_sums = param_counts.copy()
-    
-    for aspect in aspects:
-        if aspect in ASPECT_PARAMS:
-            for param, value in ASPECT_PARAMS[aspect].items():
-                param_sums[param] += value
-                param_counts[param] += 1
-    
-    for param in param_counts:
-        if param_counts[param] > 0:
-            value = param_sums[param] / param_counts[param]
-            settings[param] = int(value) if param == "max_tokens" else value
-    
-    return settings
-
-async def stream_response(client: Optional[AsyncOpenAI], messages: List[Dict[str, str]], settings: Dict[str, Any]) -> str:
-    """Stream a response from the LLM API."""
+async def stream_response(
+    client: Optional[AsyncOpenAI],
+    messages: List[Dict[str, str]],
+    settings: Dict[str, Any],
+    stop_criteria: Optional[List[StopCriterion]] = None,
+    info: Optional[Dict[str, Any]] = None
+) -> str:
+    """Stream a response from the LLM API, stopping early when a stop criterion fires."""
     # Create a new client if none was provided
     if client is None:
         client = create_client()
-        
-    response = await client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=messages,
-        **settings,
-        stream=True
-    )
     
-    response_text = ""
-    async for chunk in response:
-        if chunk.choices[0].delta.content is not None:
-            response_text += chunk.choices[0].delta.content
+    # The wall-clock cap also has to fire while the upstream sends nothing at all
+    wall_clock = next((criterion for criterion in stop_criteria or [] if isinstance(criterion, WallClock)), None)
     
+    def remaining() -> Optional[float]:
+        return None if wall_clock is None else max(wall_clock.max_seconds - (time.perf_counter() - start), 0)
+    
+    start = time.perf_counter()
+    response_text = ""
+    finish_reason = None
+    stop_reason = None
+    try:
+        response = await asyncio.wait_for(
+            client.chat.completions.create(model=APP_CONFIG["model"], messages=messages, **settings, stream=True),
+            remaining()
+        )
+    except asyncio.TimeoutError:
+        response = None
+        stop_reason = wall_clock.check(response_text, "", wall_clock.max_seconds)
+        finish_reason = "stop_criterion"
+    
+    chunks = response.__aiter__() if response is not None else None
+    while chunks is not None:
+        try:
+            chunk = await asyncio.wait_for(chunks.__anext__(), remaining())
+        except StopAsyncIteration:
+            break
+        except asyncio.TimeoutError:
+            stop_reason = wall_clock.check(response_text, "", wall_clock.max_seconds)
+            await response.response.aclose()
+            finish_reason = "stop_criterion"
+            break
+        if chunk.choices[0].finish_reason is not None:
+            finish_reason = chunk.choices[0].finish_reason
+        content = chunk.choices[0].delta.content
+        if content is None:
+            continue
+        response_text += content
+        
+        elapsed = time.perf_counter() - start
+        for criterion in stop_criteria or []:
+            stop_reason = criterion.check(response_text, content, elapsed)
+            if stop_reason:
+                response_text = criterion.trim(response_text)
+                break
+        if stop_reason:
+            # Closing the connection stops the upstream generation
+            await response.response.aclose()
+            finish_reason = "stop_criterion"
+            break
+    
+    if info is not None:
+        info.update({
+            "finish_reason": finish_reason,
+            "stop_reason": stop_reason,
+            "elapsed": time.perf_counter() - start
+        })
     return response_text
 
 async def generate_comparison(message: cl.Message, client: Optional[AsyncOpenAI], test_config: Dict[str, Any]):
@@ -115,34 +123,38 @@ async def generate_comparison(message: cl.Message, client: Optional[AsyncOpenAI]
     if client is None:
         client = create_client()
         
-    # Get templates and settings
-    default_settings = TEST_CONFIG["settings"]["default"]
-    specialized_settings = adjust_settings_for_aspects(
-        TEST_CONFIG["settings"]["specialized"],
-        test_config["aspects"]
+    # Get templates and settings, sizing max_tokens from past output lengths
+    length_model = get_length_model()
+    default_key = f"{test_config['template']}:default"
+    specialized_key = f"{test_config['template']}:specialized"
+    default_settings = length_model.apply(default_key, APP_CONFIG["model"], TEST_CONFIG["settings"]["default"])
+    specialized_settings = length_model.apply(
+        specialized_key,
+        APP_CONFIG["model"],
+        adjust_settings_for_aspects(TEST_CONFIG["settings"]["specialized"], test_config["aspects"])
     )
     
     # Create messages
-    default_messages = [
-        {"role": "system", "content": CHAT_CONFIG["system_template"]},
-        {"role": "user", "content": message.content}
-    ]
-    
-    specialized_messages = [
-        {"role": "system", "content": test_config["templates"]["system"]},
-        {"role": "user", "content": test_config["templates"]["user"].format(input=message.content)}
-    ]
+    default_messages, specialized_messages = build_messages(test_config, message.content)
     
-    # Get responses
-    default_response = await stream_response(client, default_messages, default_settings)
-    specialized_response = await stream_response(client, specialized_messages, specialized_settings)
+    # Get responses; only the specialized prompt asks for the test's length limits
+    default_info: Dict[str, Any] = {}
+    specialized_info: Dict[str, Any] = {}
+    default_response = await stream_response(
+        client, default_messages, default_settings, build_stop_criteria(), default_info
+    )
+    specialized_response = await stream_response(
+        client, specialized_messages, specialized_settings, build_stop_criteria(test_config), specialized_info
+    )
+    length_model.record(default_key, APP_CONFIG["model"], default_response, default_info["finish_reason"])
+    length_model.record(specialized_key, APP_CONFIG["model"], specialized_response, specialized_info["finish_reason"])
     
     # Prepare prompt comparison
     prompt_comparison = {
         "default_system": format_template_text(CHAT_CONFIG["system_template"]),
         "default_user": format_template_text(message.content),
         "specialized_system": format_template_text(test_config["templates"]["system"]),
-        "specialized_user": format_template_text(test_config["templates"]["user"].format(input=message.content))
+        "specialized_user": format_template_text(specialized_messages[1]["content"])
     }
     
     # Prepare parameter comparison
@@ -163,6 +175,22 @@ async def generate_comparison(message: cl.Message, client: Optional[AsyncOpenAI]
             "impact": impact_desc
         })
     
+    # Score the responses with local metrics
+    metrics = None
+    if METRICS_CONFIG["enabled"] and test_config.get("metrics"):
+        comparison = build_comparison(test_config, message.content, default_response, specialized_response)
+        metrics = (await score_comparisons([comparison]))[0]
+    
+    # Score the responses against the test aspects
+    judgement = None
+    if JUDGE_CONFIG["enabled"]:
+        item = (test_config["aspects"], message.content, default_response, specialized_response)
+        try:
+            judgement = (await judge_comparisons(client, [item]))[0]
+        except Exception as error:
+            # The judge is optional; still show the responses that were already paid for
+            logger.warning("Judge call failed: %s", error)
+    
     # Stream the comparison message
     await stream_comparison_message(
         test_config=test_config,
@@ -171,5 +199,9 @@ async def generate_comparison(message: cl.Message, client: Optional[AsyncOpenAI]
         default_response=default_response,
         specialized_response=specialized_response,
         prompt_comparison=prompt_comparison,
-        param_comparison=param_comparison
+        param_comparison=param_comparison,
+        metrics=metrics,
+        judgement=judgement,
+        stop_reasons={"default": default_info["stop_reason"], "specialized": specialized_info["stop_reason"]},
+        length_report=length_model.report(specialized_key, APP_CONFIG["model"])
     ) 
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""
+Semantic Cache Module - Serves cached answers for near-duplicate chat questions.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from config import CACHE_CONFIG
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Words that can differ between two phrasings of the same question
+FILLER_WORDS = {
+    "a", "an", "the", "what", "whats", "how", "why", "which", "who", "is", "are", "was", "were", "be",
+    "do", "does", "did", "can", "could", "would", "should", "will", "i", "me", "my", "you", "please",
+    "tell", "explain", "describe", "about", "of", "in", "on", "to", "for", "and", "or", "it", "its",
+    "this", "that", "there", "some", "any",
+}
+
+NEGATIONS = {"not", "no", "never", "none", "nor", "without", "cannot"}
+
+_cache: Optional["SemanticCache"] = None
+
+def _hash(feature: str) -> int:
+    """Stable hash for an n-gram feature."""
+    return zlib.crc32(feature.encode("utf-8"))
+
+def _stem(word: str) -> str:
+    """Strip a plural ending so "maps" and "map" count as the same word."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("es") and word[-3] in "sxh":
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def key_terms(text: str) -> Tuple[str, ...]:
+    """Content words of a question in order, singularized; numbers and negations are always kept."""
+    words = (word[:-2] if word.endswith("'s") else word for word in TOKEN_PATTERN.findall(text.lower()))
+    return tuple(_stem(word) for word in words if word and word not in FILLER_WORDS)
+
+def embed(text: str, dimensions: int) -> np.ndarray:
+    """Embed the key terms of a question as an L2-normalized vector of hashed word unigrams and bigrams."""
+    terms = key_terms(text)
+    features = list(terms) + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+
+    vector = np.zeros(dimensions, dtype=np.float32)
+    if not features:
+        return vector
+    hashes = np.fromiter((_hash(feature) for feature in features), dtype=np.uint64, count=len(features))
+    # The top hash bit picks a sign so collisions tend to cancel out
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, (hashes % dimensions).astype(np.intp), signs)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def _risky_tokens(terms: Tuple[str, ...]) -> Tuple[List[str], Set[str]]:
+    """Numbers and negations of a question, which flip its answer without moving its embedding much."""
+    numbers = [word for word in terms if any(char.isdigit() for char in word)]
+    negations = {word for word in terms if word in NEGATIONS or word.endswith("n't")}
+    return numbers, negations
+
+def same_meaning(first: Tuple[str, ...], second: Tuple[str, ...]) -> bool:
+    """Check what the similarity score cannot: same numbers, negations and order of shared words."""
+    if _risky_tokens(first) != _risky_tokens(second):
+        return False
+    # "Is Python faster than Java?" and "Is Java faster than Python?" share every word
+    shared = set(first) & set(second)
+    return [word for word in dict.fromkeys(first) if word in shared] == [
+        word for word in dict.fromkeys(second) if word in shared
+    ]
+
+class LSHIndex:
+    """Approximate nearest-neighbour index using random-hyperplane hashing."""
+
+    def __init__(self, dimensions: int, tables: int, bits: int, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((tables, bits, dimensions)).astype(np.float32)
+        self.powers = 1 << np.arange(bits, dtype=np.int64)
+        self.buckets: List[Dict[int, Set[int]]] = [{} for _ in range(tables)]
+        self.row_keys: Dict[int, np.ndarray] = {}
+
+    def _keys(self, vector: np.ndarray) -> np.ndarray:
+        """Compute the bucket key of a vector in every table."""
+        return ((self.planes @ vector) > 0).astype(np.int64) @ self.powers
+
+    def add(self, row: int, vector: np.ndarray):
+        """Index a cache row."""
+        self.remove(row)
+        keys = self._keys(vector)
+        for table, key in zip(self.buckets, keys.tolist()):
+            table.setdefault(key, set()).add(row)
+        self.row_keys[row] = keys
+
+    def remove(self, row: int):
+        """Drop a cache row from the index."""
+        keys = self.row_keys.pop(row, None)
+        if keys is None:
+            return
+        for table, key in zip(self.buckets, keys.tolist()):
+            table[key].discard(row)
+            if not table[key]:
+                del table[key]
+
+    def candidates(self, vector: np.ndarray) -> np.ndarray:
+        """Return rows sharing a bucket with the vector in any table."""
+        rows: Set[int] = set()
+        for table, key in zip(self.buckets, self._keys(vector).tolist()):
+            rows.update(table.get(key, ()))
+        return np.fromiter(rows, dtype=np.intp, count=len(rows))
+
+class SemanticCache:
+    """Bounded cache of answers keyed by embedded questions, with LRU eviction."""
+
+    def __init__(self, capacity: int, dimensions: int, threshold: float, ann: bool = False):
+        self.dimensions = dimensions
+        self.threshold = threshold
+        self.vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.namespaces = np.full(capacity, -1, dtype=np.int64)  # -1 marks an empty row
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.answers: List[Optional[str]] = [None] * capacity
+        self.terms: List[Optional[Tuple[str, ...]]] = [None] * capacity
+        self.clock = 0
+        self.size = 0
+        self.index = LSHIndex(dimensions, CACHE_CONFIG["ann_tables"], CACHE_CONFIG["ann_bits"]) if ann else None
+
+    def _tick(self) -> int:
+        self.clock += 1
+        return self.clock
+
+    def lookup(self, template: str, text: str) -> Optional[str]:
+        """Return a cached answer for a similar question under the same template."""
+        if self.size == 0:
+            return None
+        vector = embed(text, self.dimensions)
+        if self.index is not None and self.size >= min(CACHE_CONFIG["ann_min_size"], len(self.answers)):
+            rows = self.index.candidates(vector)
+        else:
+            rows = np.flatnonzero(self.namespaces >= 0)
+        rows = rows[self.namespaces[rows] == _hash(template)]
+        if rows.size == 0:
+            return None
+
+        # The embedding ignores filler words and word order, so a hit also needs the same
+        # numbers, negations and order of shared words
+        similarities = self.vectors[rows] @ vector
+        terms = key_terms(text)
+        for best in np.argsort(-similarities):
+            if similarities[best] < self.threshold:
+                break
+            row = int(rows[best])
+            if same_meaning(self.terms[row], terms):
+                self.last_used[row] = self._tick()
+                return self.answers[row]
+        return None
+
+    def store(self, template: str, text: str, answer: str):
+        """Cache an answer, evicting the least recently used entry when full."""
+        empty = np.flatnonzero(self.namespaces < 0)
+        if empty.size:
+            row = int(empty[0])
+            self.size += 1
+        else:
+            row = int(np.argmin(self.last_used))
+        vector = embed(text, self.dimensions)
+        self.vectors[row] = vector
+        self.namespaces[row] = _hash(template)
+        self.last_used[row] = self._tick()
+        self.answers[row] = answer
+        self.terms[row] = key_terms(text)
+        if self.index is not None:
+            self.index.add(row, vector)
+
+def get_semantic_cache() -> SemanticCache:
+    """Get the shared semantic cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = SemanticCache(
+            capacity=CACHE_CONFIG["capacity"],
+            dimensions=CACHE_CONFIG["dimensions"],
+            threshold=CACHE_CONFIG["threshold"],
+            ann=CACHE_CONFIG["ann"]
+        )
+    return _cache
@@ -0,0 +1,167 @@
+"""
+Stop Criteria Module - Ends streamed responses early once they have said enough.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from config import STOP_CONFIG
+
+# Length budgets implied by the aspects being tested
+ASPECT_STOP = {
+    "conciseness": {"max_words": 250},
+    "simplicity": {"max_words": 400},
+}
+
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s")
+WORD = re.compile(r"\S+")
+
+class StopCriterion:
+    """Base class for criteria evaluated as streamed chunks arrive."""
+
+    def check(self, text: str, chunk: str, elapsed: float) -> Optional[str]:
+        """Return a stop reason once the criterion fires, otherwise None."""
+        raise NotImplementedError
+
+    def trim(self, text: str) -> str:
+        """Trim the text received so far to a clean stopping point."""
+        return text
+
+class WordBudget(StopCriterion):
+    """Stop once the response reaches a number of words."""
+
+    def __init__(self, max_words: int):
+        self.max_words = max_words
+        self.words = 0
+
+    def check(self, text: str, chunk: str, elapsed: float) -> Optional[str]:
+        if not chunk:
+            return None
+        self.words += len(WORD.findall(chunk))
+        # A chunk continuing the previous word does not start a new one
+        previous = text[-len(chunk) - 1:-len(chunk)] if len(text) > len(chunk) else ""
+        if previous and not previous.isspace() and chunk[:1] and not chunk[:1].isspace():
+            self.words -= 1
+        if self.words > self.max_words:
+            return f"word budget of {self.max_words} reached"
+        return None
+
+    def trim(self, text: str) -> str:
+        matches = list(WORD.finditer(text))
+        if len(matches) <= self.max_words:
+            return text
+        text = text[:matches[self.max_words - 1].end()]
+        # Prefer ending on the last complete sentence within the budget
+        ends = [match.end() for match in SENTENCE_END.finditer(text + " ")]
+        return text[:ends[-1]].rstrip() if ends else text
+
+class SentenceBudget(StopCriterion):
+    """Stop once the response has completed a number of sentences."""
+
+    def __init__(self, max_sentences: int):
+        self.max_sentences = max_sentences
+
+    def _ends(self, text: str) -> List[int]:
+        return [match.end() for match in SENTENCE_END.finditer(text)]
+
+    def check(self, text: str, chunk: str, elapsed: float) -> Optional[str]:
+        # Only rescan when the chunk could have finished a sentence
+        if not re.search(r"[.!?\s]", chunk):
+            return None
+        if len(self._ends(text)) >= self.max_sentences:
+            return f"sentence budget of {self.max_sentences} reached"
+        return None
+
+    def trim(self, text: str) -> str:
+        ends = self._ends(text)
+        if len(ends) < self.max_sentences:
+            return text
+        return text[:ends[self.max_sentences - 1]].rstrip()
+
+class RepetitionDetector(StopCriterion):
+    """Stop when the same run of words keeps repeating."""
+
+    def __init__(self, ngram: int, max_repeats: int):
+        self.ngram = ngram
+        self.max_repeats = max_repeats
+        self.counts: Dict[str, int] = {}
+        self.seen_words = 0
+
+    def check(self, text: str, chunk: str, elapsed: float) -> Optional[str]:
+        if not re.search(r"\s", chunk):
+            return None
+        # The last word may still be incomplete, so only count finished ones
+        words = WORD.findall(text)
+        if text and not text[-1].isspace():
+            words = words[:-1]
+        for end in range(max(self.seen_words, self.ngram), len(words) + 1):
+            key = " ".join(words[end - self.ngram:end]).lower()
+            self.counts[key] = self.counts.get(key, 0) + 1
+            if self.counts[key] >= self.max_repeats:
+                self.seen_words = end
+                return f"repeated text detected ({self.ngram}-word sequence seen {self.max_repeats} times)"
+        self.seen_words = max(self.seen_words, len(words) + 1)
+        return None
+
+class RegexSentinel(StopCriterion):
+    """Stop when the response produces a sentinel pattern."""
+
+    def __init__(self, pattern: str, window: int = 200):
+        self.pattern = re.compile(pattern)
+        self.window = window
+
+    def check(self, text: str, chunk: str, elapsed: float) -> Optional[str]:
+        # Only the recent tail can contain a new match
+        if self.pattern.search(text[-(len(chunk) + self.window):]):
+            return f"sentinel /{self.pattern.pattern}/ matched"
+        return None
+
+    def trim(self, text: str) -> str:
+        match = self.pattern.search(text)
+        return text[:match.start()].rstrip() if match else text
+
+class WallClock(StopCriterion):
+    """Stop once streaming has taken too long."""
+
+    def __init__(self, max_seconds: float):
+        self.max_seconds = max_seconds
+
+    def check(self, text: str, chunk: str, elapsed: float) -> Optional[str]:
+        if elapsed >= self.max_seconds:
+            return f"time limit of {self.max_seconds:g}s reached"
+        return None
+
+def _test_limits(test_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge the aspect and test stop settings; test settings win."""
+    limits: Dict[str, Any] = {}
+    for aspect in (test_config or {}).get("aspects", []):
+        for key, value in ASPECT_STOP.get(aspect, {}).items():
+            limits[key] = min(limits.get(key, value), value)
+    limits.update((test_config or {}).get("stop", {}))
+    return limits
+
+def budget_instruction(test_config: Dict[str, Any]) -> str:
+    """Describe a test's enforced length budgets so the prompt can ask for them."""
+    if not STOP_CONFIG["enabled"]:
+        return ""
+    limits = _test_limits(test_config)
+    budgets = [f"{limits[key]} {unit}" for key, unit in (("max_words", "words"), ("max_sentences", "sentences")) if key in limits]
+    return f"Keep your answer to at most {' and '.join(budgets)}." if budgets else ""
+
+def build_stop_criteria(test_config: Optional[Dict[str, Any]] = None) -> List[StopCriterion]:
+    """Build fresh stop criteria for one response from the global, aspect and test settings."""
+    if not STOP_CONFIG["enabled"]:
+        return []
+
+    limits = _test_limits(test_config)
+
+    criteria: List[StopCriterion] = [WallClock(limits.get("max_seconds", STOP_CONFIG["max_seconds"]))]
+    if STOP_CONFIG["repetition_ngram"]:
+        criteria.append(RepetitionDetector(STOP_CONFIG["repetition_ngram"], STOP_CONFIG["repetition_max"]))
+    if "max_words" in limits:
+        criteria.append(WordBudget(limits["max_words"]))
+    if "max_sentences" in limits:
+        criteria.append(SentenceBudget(limits["max_sentences"]))
+    for pattern in limits.get("sentinels", []):
+        criteria.append(RegexSentinel(pattern))
+    return criteria
@@ -3,13 +3,11 @@ Test handler module for managing test mode functionality in the LLM Response Tes
 """
 
 import chainlit as cl
-from config import APP_CONFIG, TEST_CONFIG
+from config import APP_CONFIG
+from utils.catalog import get_catalog
 from utils.response_handler import generate_comparison
 from utils.ui import show_mode_switch_button, show_test_options, show_mode_transition
 
-# List of keys that are not test configurations
-NON_TEST_KEYS = {"settings", "enabled", "auto_test", "log_level"}
-
 @cl.action_callback("switch_mode")
 async def switch_mode():
     """Switch between test and default modes."""
@@ -25,19 +23,38 @@ async def switch_mode():
     
     await show_mode_transition(new_mode == "test")
 
-@cl.action_callback("select_test1")
-@cl.action_callback("select_test2")
-@cl.action_callback("select_test3")
-@cl.action_callback("select_test4")
-@cl.action_callback("select_test5")
+@cl.action_callback("select_test")
 async def on_test_select(action: cl.Action):
     """Handle test selection."""
     test_key = action.value
-    test_config = TEST_CONFIG[test_key]
+    test_config = get_catalog().get(test_key)
+    if test_config is None:
+        await cl.Message(content=f"⚠️ Test `{test_key}` is no longer in the catalog.").send()
+        await show_current_test_options()
+        return
     
     message = cl.Message(content=test_config["example"])
     await generate_comparison(message, cl.user_session.get("client"), test_config)
-    await show_test_options()
+    await show_current_test_options()
+
+@cl.action_callback("test_page")
+async def on_test_page(action: cl.Action):
+    """Show another page of test options."""
+    page, _, tag = action.value.partition("|")
+    cl.user_session.set("test_page", int(page))
+    cl.user_session.set("test_tag", tag or None)
+    await show_current_test_options()
+
+@cl.action_callback("filter_tests")
+async def on_filter_tests(action: cl.Action):
+    """Filter test options by tag."""
+    cl.user_session.set("test_page", 0)
+    cl.user_session.set("test_tag", action.value or None)
+    await show_current_test_options()
+
+async def show_current_test_options():
+    """Show test options at the page and tag filter stored in the user session."""
+    await show_test_options(cl.user_session.get("test_page", 0), cl.user_session.get("test_tag"))
 
 async def show_mode_switch_button():
     """Display the mode switch button."""
@@ -56,28 +73,10 @@ async def show_mode_switch_button():
         ]
     ).send()
 
-async def show_test_options():
-    """Display available test options to the user."""
-    actions = [
-        cl.Action(
-            name=f"select_{test_key}",
-            value=test_key,
-            label=config["label"],
-            description=config["description"]
-        )
-        for test_key, config in TEST_CONFIG.items()
-        if test_key not in NON_TEST_KEYS
-    ]
-    
-    await cl.Message(
-        content="🧪 Choose your experiment:",
-        actions=actions
-    ).send()
-
 async def handle_message(message: cl.Message, client):
     """Main entry point for handling messages in test mode."""
     cl.user_session.set("client", client)
-    await show_test_options()
+    await show_current_test_options()
     return True
 
 async def switch_to_test_mode():
@@ -3,11 +3,12 @@ UI Components Module - Handles all UI-related functionality.
 """
 
 import chainlit as cl
-from config import APP_CONFIG, TEST_CONFIG
-from typing import List
+from config import APP_CONFIG, LENGTH_CONFIG, CATALOG_CONFIG
+from typing import Any, Dict, List, Optional
+from utils.formatting import format_metric
+from utils.metrics import METRIC_LABELS
+from utils.catalog import get_catalog
 
-# Constants
-NON_TEST_KEYS = {"settings", "enabled", "auto_test", "log_level"}
 
 async def show_welcome_message():
     """Display the welcome message."""
@@ -51,21 +52,39 @@ async def show_mode_switch_button():
         ]
     ).send()
 
-async def show_test_options():
-    """Display available test options to the user."""
-    actions = [
-        cl.Action(
-            name=f"select_{test_key}",
+async def show_test_options(page: int = 0, tag: Optional[str] = None):
+    """Display one page of test options, optionally filtered by tag."""
+    catalog = get_catalog()
+    keys, pages = catalog.page(page, CATALOG_CONFIG["page_size"], tag)
+    page = min(max(page, 0), pages - 1)
+    
+    actions = []
+    for test_key in keys:
+        config = catalog.get(test_key)
+        actions.append(cl.Action(
+            name="select_test",
             value=test_key,
             label=config["label"],
             description=config["description"]
-        )
-        for test_key, config in TEST_CONFIG.items()
-        if test_key not in NON_TEST_KEYS
-    ]
+        ))
+    
+    # Page navigation keeps the current tag filter
+    if page > 0:
+        actions.append(cl.Action(name="test_page", value=f"{page - 1}|{tag or ''}", label="⬅️ Previous"))
+    if page < pages - 1:
+        actions.append(cl.Action(name="test_page", value=f"{page + 1}|{tag or ''}", label="Next ➡️"))
     
+    # Tag filters
+    if tag:
+        actions.append(cl.Action(name="filter_tests", value="", label="🏷️ All tests", collapsed=True))
+    for test_tag in catalog.tags():
+        if test_tag != tag:
+            actions.append(cl.Action(name="filter_tests", value=test_tag, label=f"🏷️ {test_tag}", collapsed=True))
+    
+    filter_note = f" tagged **{tag}**" if tag else ""
+    page_note = f" (page {page + 1}/{pages})" if pages > 1 else ""
     await cl.Message(
-        content="🧪 Choose your experiment:",
+        content=f"🧪 Choose your experiment{filter_note}{page_note}:",
         actions=actions
     ).send()
 
@@ -87,7 +106,11 @@ async def stream_comparison_message(
     default_response: str,
     specialized_response: str,
     prompt_comparison: dict,
-    param_comparison: List[dict]
+    param_comparison: List[dict],
+    metrics: Optional[Dict[str, Dict[str, float]]] = None,
+    judgement: Optional[Dict[str, Any]] = None,
+    stop_reasons: Optional[Dict[str, Optional[str]]] = None,
+    length_report: Optional[Dict[str, Any]] = None
 ):
     """Stream a formatted comparison message."""
     comparison_msg = cl.Message(content="")
@@ -104,17 +127,43 @@ async def stream_comparison_message(
 """)
     
     # Add responses
+    stop_reasons = stop_reasons or {}
     await comparison_msg.stream_token("\n## Default Response\n")
     await comparison_msg.stream_token(default_response)
+    if stop_reasons.get("default"):
+        await comparison_msg.stream_token(f"\n\n> ⏹️ Stopped early: {stop_reasons['default']}")
     
     await comparison_msg.stream_token("\n\n## Specialized Response\n")
     await comparison_msg.stream_token(specialized_response)
+    if stop_reasons.get("specialized"):
+        await comparison_msg.stream_token(f"\n\n> ⏹️ Stopped early: {stop_reasons['specialized']}")
     
     # Add analysis
     await comparison_msg.stream_token("\n\n## Analysis\n")
-    await comparison_msg.stream_token("This test evaluates:\n")
-    for aspect in aspects:
-        await comparison_msg.stream_token(f"- **{aspect}**\n")
+    if judgement:
+        await comparison_msg.stream_token("| Aspect | Default | Specialized |\n")
+        await comparison_msg.stream_token("|:-------|:--------|:------------|\n")
+        for aspect in aspects:
+            await comparison_msg.stream_token(
+                f"| **{aspect}** | {judgement['default'][aspect]:.0f} | {judgement['specialized'][aspect]:.0f} |\n"
+            )
+        if judgement["verdict"]:
+            await comparison_msg.stream_token(f"\n**Verdict:** {judgement['verdict']}\n")
+    else:
+        await comparison_msg.stream_token("This test evaluates:\n")
+        for aspect in aspects:
+            await comparison_msg.stream_token(f"- **{aspect}**\n")
+    
+    # Add automatic metrics
+    if metrics:
+        await comparison_msg.stream_token("\n### Automatic Metrics\n\n")
+        await comparison_msg.stream_token("| Metric | Default | Specialized |\n")
+        await comparison_msg.stream_token("|:-------|:--------|:------------|\n")
+        for name, default_val in metrics["default"].items():
+            await comparison_msg.stream_token(
+                f"| {METRIC_LABELS.get(name, name)} | {format_metric(default_val)} | "
+                f"{format_metric(metrics['specialized'][name])} |\n"
+            )
     
     # Add prompt comparison
     await comparison_msg.stream_token("\n### Prompt Comparison\n\n")
@@ -134,4 +183,11 @@ async def stream_comparison_message(
             f"{param['change']:+.2f} | {param['impact']} |\n"
         )
     
+    if length_report and length_report["samples"]:
+        await comparison_msg.stream_token(
+            f"\nAdaptive max tokens: p{LENGTH_CONFIG['quantile'] * 100:.0f} of {length_report['samples']} specialized responses "
+            f"is {length_report['quantile']} tokens, headroom ×{length_report['headroom']:.2f}, "
+            f"truncation rate {length_report['truncation_rate']:.1%}\n"
+        )
+    
     await comparison_msg.send() 
\ No newline at end of file